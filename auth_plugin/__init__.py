@@ -1,7 +1,14 @@
 from .jwt import (
-    JWTAuthPlugin,
     TokenConfig,
     JWTError
 )
 
 __version__ = "0.5.0"
+
+
+def __getattr__(name):
+    # Importing the plugin loads PyJWT and cryptography; defer until used
+    if name == "JWTAuthPlugin":
+        from .jwt import JWTAuthPlugin
+        return JWTAuthPlugin
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
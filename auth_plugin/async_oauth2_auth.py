@@ -0,0 +1,155 @@
+import asyncio
+import logging
+
+import httpx
+
+from .base_auth import BaseAuth
+from .oauth2_auth import _scope_key
+
+
+class AsyncOAuth2Auth(BaseAuth):
+    """asyncio OAuth2 client for the authorization code and refresh token grants
+
+    Requests share one pooled `httpx.AsyncClient`. Identical concurrent
+    token requests, such as a code submitted twice or many coroutines
+    refreshing the same token, are merged into one call whose result every
+    caller receives. At most ``max_concurrency`` calls to the token
+    endpoint are in flight at once; further callers wait their turn.
+    Failed connection attempts are retried ``max_retries`` times.
+
+    Requires the ``httpx`` package (``pip install auth-plugin[async]``).
+
+    Args:
+        client_id (str): Client identifier
+        client_secret (str): Client secret
+        redirect_uri (str): Redirect URI registered with the provider
+        auth_url (str): Authorization endpoint
+        token_url (str): Token endpoint
+        max_connections (int): Size of the connection pool
+        connect_timeout (float): Seconds to wait for a connection
+        read_timeout (float): Seconds to wait for response data
+        max_retries (int): Retries of failed connection attempts
+        max_concurrency (int): Maximum number of token requests in flight
+        client (Optional[httpx.AsyncClient]): Client to use instead of a
+            private one. It is used as is and not closed by `close`.
+
+    Example:
+        >>> async with AsyncOAuth2Auth(client_id, client_secret, redirect_uri,
+        ...                            auth_url, token_url) as oauth:
+        ...     token = await oauth.get_access_token(code)
+    """
+
+    def __init__(self, client_id, client_secret, redirect_uri, auth_url, token_url,
+                 max_connections=10, connect_timeout=3.05, read_timeout=10.0,
+                 max_retries=2, max_concurrency=10, client=None):
+        if max_connections <= 0 or max_concurrency <= 0:
+            raise ValueError("max_connections and max_concurrency must be positive")
+        if connect_timeout <= 0 or read_timeout <= 0:
+            raise ValueError("Timeouts must be positive")
+        if max_retries < 0:
+            raise ValueError("max_retries must not be negative")
+
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.redirect_uri = redirect_uri
+        self.auth_url = auth_url
+        self.token_url = token_url
+        self.max_concurrency = max_concurrency
+        self._owns_client = client is None
+        self.client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            transport=httpx.AsyncHTTPTransport(
+                retries=max_retries,
+                limits=httpx.Limits(max_connections=max_connections,
+                                    max_keepalive_connections=max_connections)),
+        )
+        self._inflight = {}
+        # Created on first use so that it binds to the running loop
+        self._semaphore = None
+
+    async def close(self):
+        """Close the pooled connections of the private client"""
+        if self._owns_client:
+            await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def get_authorization_url(self):
+        try:
+            auth_url = f"{self.auth_url}?client_id={self.client_id}&redirect_uri={self.redirect_uri}&response_type=code"
+            logging.info("Authorization URL generated successfully")
+            return auth_url
+        except Exception as e:
+            logging.error(f"Error generating authorization URL: {str(e)}")
+            raise RuntimeError("Failed to generate authorization URL")
+
+    async def get_access_token(self, code):
+        """Exchange an authorization code for an access token
+
+        See `OAuth2Auth.get_access_token`.
+
+        Raises:
+            RuntimeError: If the token endpoint rejects the request
+        """
+        response = await self._request_token({
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "code": code,
+            "redirect_uri": self.redirect_uri,
+            "grant_type": "authorization_code",
+        })
+        logging.info("Access token received successfully")
+        return response.get("access_token")
+
+    async def refresh_access_token(self, refresh_token, scope=None):
+        """Exchange a refresh token for a new token response
+
+        See `OAuth2Auth.refresh_access_token`.
+
+        Raises:
+            RuntimeError: If the token endpoint rejects the request
+        """
+        data = {
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "refresh_token": refresh_token,
+            "grant_type": "refresh_token",
+        }
+        if scope:
+            data["scope"] = _scope_key(scope)
+        return await self._request_token(data)
+
+    async def _request_token(self, data):
+        """POST data to the token endpoint, sharing the call with identical requests in flight"""
+        key = tuple(sorted(data.items()))
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._post_token(data))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # A cancelled caller must not cancel the request for the others
+        response = await asyncio.shield(task)
+        # Callers may modify the response; each gets its own copy
+        return dict(response)
+
+    async def _post_token(self, data):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        try:
+            async with self._semaphore:
+                response = await self.client.post(self.token_url, data=data)
+            response.raise_for_status()
+            payload = response.json()
+            if not isinstance(payload, dict):
+                raise ValueError("Token response is not a JSON object")
+            return payload
+        except httpx.HTTPError as e:
+            logging.error(f"Error getting access token: {str(e)}")
+            raise RuntimeError("Failed to obtain access token")
+        except Exception as e:
+            logging.error(f"Unexpected error: {str(e)}")
+            raise RuntimeError("An unexpected error occurred during token retrieval")
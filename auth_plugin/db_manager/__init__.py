@@ -1,14 +1,28 @@
-import logging
-from .handlers.mongo import MongoDBManager
-from .handlers.postgres import PostgresDBManager
-from .handlers.mysql import MySQLManager
+import importlib
+
 from .exceptions import DBConfigurationError
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Handlers are imported on first use so that only the chosen backend's
+# driver (pymongo, SQLAlchemy, mysql.connector) is loaded
+_HANDLERS = {
+    'MongoDBManager': '.handlers.mongo',
+    'PostgresDBManager': '.handlers.postgres',
+    'MySQLManager': '.handlers.mysql',
+}
+
+_DB_TYPES = {
+    'mongodb': 'MongoDBManager',
+    'mongo': 'MongoDBManager',
+    'postgresql': 'PostgresDBManager',
+    'mysql': 'MySQLManager'
+}
+
+
+def __getattr__(name):
+    module_name = _HANDLERS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module_name, __name__), name)
 
 
 def create_db_manager(db_type: str, **kwargs):
@@ -22,17 +36,11 @@ def create_db_manager(db_type: str, **kwargs):
     Returns:
         Database manager instance
     """
-    db_types = {
-        'mongodb': MongoDBManager,
-        'mongo': MongoDBManager,
-        'postgresql': PostgresDBManager,
-        'mysql': MySQLManager
-    }
-
-    manager_class = db_types.get(db_type.lower())
-    if not manager_class:
+    class_name = _DB_TYPES.get(db_type.lower())
+    if not class_name:
         raise DBConfigurationError(f"Unsupported database type: {db_type}")
 
+    manager_class = __getattr__(class_name)
     return manager_class(**kwargs)
 
 
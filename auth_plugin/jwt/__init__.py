@@ -1,10 +1,15 @@
 """JWT Authentication Plugin
 
 A robust Python library for JWT token generation, validation and management.
-Supports both HS256 and RS256 algorithms with token blacklisting capabilities.
+Supports HS*, RS*, ES* and EdDSA algorithms with token blacklisting capabilities.
+
+Only the configuration and exception classes are imported eagerly; the
+plugin and its dependencies (PyJWT, cryptography, SQLAlchemy, asyncio) load
+on first attribute access.
 """
 
-from .plugin import JWTAuthPlugin
+import importlib
+
 from .config import TokenConfig
 from .exceptions import (
     JWTError,
@@ -16,13 +21,62 @@ from .exceptions import (
     JWTAlgorithmError
 )
 
+# Attributes imported from a submodule on first access
+_LAZY_ATTRIBUTES = {
+    'JWTAuthPlugin': '.plugin',
+    'AsyncJWTAuthPlugin': '.aio',
+    'ASGIAuthMiddleware': '.middleware',
+    'WSGIAuthMiddleware': '.middleware',
+    'BloomFilter': '.bloom',
+    'KeyStore': '.keystore',
+    'KeySet': '.keyset',
+    'JWKSClient': '.jwks',
+    'Metrics': '.metrics',
+    'PrometheusMetrics': '.metrics',
+    'RevocationStore': '.revocation',
+    'MongoRevocationStore': '.revocation',
+    'SQLRevocationStore': '.revocation',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
 __version__ = "0.5.0"
 __author__ = "Visesh Agarwal"
 
 __all__ = [
     # Main classes
     'JWTAuthPlugin',
+    'AsyncJWTAuthPlugin',
     'TokenConfig',
+    'BloomFilter',
+    'KeyStore',
+    'KeySet',
+    'JWKSClient',
+
+    # Middleware
+    'ASGIAuthMiddleware',
+    'WSGIAuthMiddleware',
+
+    # Metrics
+    'Metrics',
+    'PrometheusMetrics',
+
+    # Revocation stores
+    'RevocationStore',
+    'MongoRevocationStore',
+    'SQLRevocationStore',
 
     # Exceptions
     'JWTError',
@@ -0,0 +1,138 @@
+import asyncio
+import functools
+import weakref
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from .config import TokenConfig
+from .exceptions import JWTConfigurationError, JWTError, JWTInvalidTokenError
+from .metrics import Metrics, TOKENS_VERIFIED, instrument
+from .plugin import JWTAuthPlugin
+
+
+class AsyncJWTAuthPlugin:
+    """asyncio facade over JWTAuthPlugin
+
+    Signing and signature verification run on a bounded executor so they do
+    not block the event loop. Verified-token cache hits and other checks that
+    need no cryptography, including prevalidation of expiry, type and
+    algorithm, run inline. At most ``max_concurrency`` operations per event
+    loop are submitted to the executor at once; further callers wait their
+    turn. The plugin may be used from several event loops in turn, e.g. by
+    successive `asyncio.run` calls.
+
+    Args:
+        plugin (Union[JWTAuthPlugin, TokenConfig]): Plugin to wrap, or a
+            config to build one from. A plugin passed in is not closed by
+            `close`.
+        max_workers (Optional[int]): Size of the executor created when none
+            is given
+        max_concurrency (int): Maximum number of operations each event loop
+            has in flight on the executor
+        executor (Optional[Executor]): Executor to use instead of a private
+            thread pool. It is not shut down by `close`.
+
+    Example:
+        >>> auth = AsyncJWTAuthPlugin(TokenConfig(secret_key="key", algorithm="RS256"))
+        >>> access_token, refresh_token = await auth.generate_tokens({"user_id": 123})
+        >>> payload = await auth.verify_token(access_token)
+    """
+
+    def __init__(
+        self,
+        plugin: Union[JWTAuthPlugin, TokenConfig],
+        max_workers: Optional[int] = None,
+        max_concurrency: int = 64,
+        executor: Optional[Executor] = None
+    ):
+        if max_concurrency <= 0:
+            raise JWTConfigurationError("max_concurrency must be positive")
+
+        self._owns_plugin = not isinstance(plugin, JWTAuthPlugin)
+        self.plugin = JWTAuthPlugin(plugin) if self._owns_plugin else plugin
+        self.max_concurrency = max_concurrency
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="jwt-crypto")
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary())
+
+    @property
+    def metrics(self) -> Optional[Metrics]:
+        return self.plugin.metrics
+
+    @instrument("verify_token", TOKENS_VERIFIED)
+    async def verify_token(self, token: str, token_type: Optional[str] = "access") -> Dict[str, Any]:
+        """Verify and decode a JWT token
+
+        See `JWTAuthPlugin.verify_token`. A JWKS fetch for an unknown ``kid``
+        runs on the executor.
+
+        Raises:
+            JWTError: If token verification fails
+        """
+        plugin = self.plugin
+        failure_key = plugin._check_failures(token, token_type)
+        try:
+            payload = plugin._verify_cached(token, token_type)
+            if payload is not None:
+                return payload
+            try:
+                entry = plugin._prevalidate(token, token_type, refetch=False)
+            except JWTInvalidTokenError as e:
+                if plugin.jwks is None or e.message != "Unknown key id":
+                    raise
+                entry = await self._run(plugin._prevalidate, token, token_type)
+            return await self._run(plugin._verify_signature, token, token_type, entry)
+        except JWTError as e:
+            plugin._record_failure(failure_key, e)
+            raise
+
+    async def generate_tokens(self, user_data: Dict[str, Any]) -> Tuple[str, str]:
+        """Generate access and refresh tokens
+
+        See `JWTAuthPlugin.generate_tokens`.
+
+        Raises:
+            JWTError: If token generation fails
+        """
+        return await self._run(self.plugin.generate_tokens, user_data)
+
+    async def refresh_access_token(self, refresh_token: str) -> str:
+        """Refresh access token using refresh token
+
+        See `JWTAuthPlugin.refresh_access_token`.
+
+        Raises:
+            JWTError: If token refresh fails
+        """
+        return await self._run(self.plugin.refresh_access_token, refresh_token)
+
+    async def blacklist_token(self, token: str) -> None:
+        """Add token to blacklist
+
+        Runs on the executor because a revocation store may be written.
+        """
+        await self._run(self.plugin.blacklist_token, token)
+
+    async def close(self) -> None:
+        """Shut down the private executor and the plugin built from a config"""
+        if self._owns_plugin:
+            self.plugin.close()
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+    async def __aenter__(self) -> "AsyncJWTAuthPlugin":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        # A semaphore binds to the loop it is first used on, so keep one per loop
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores.setdefault(loop, asyncio.Semaphore(self.max_concurrency))
+        async with semaphore:
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args))
@@ -0,0 +1,236 @@
+import heapq
+import logging
+import threading
+from typing import Dict, Hashable, List, Optional, Tuple
+from .bloom import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBlacklist:
+    """Size-bounded set of revoked tokens indexed by expiry
+
+    Each entry records the expiry time of the revoked token. A min-heap on
+    expiry lets expired entries be dropped in O(expired) and, when the set is
+    full, evicts the entries that expire soonest.
+
+    Args:
+        max_size (int): Maximum number of entries
+
+    Example:
+        >>> blacklist = TokenBlacklist(max_size=1000)
+        >>> blacklist.add(token, exp=1700000000)
+        >>> token in blacklist
+        True
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._expiry: Dict[Hashable, float] = {}
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._sequence = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._expiry
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def add(self, key: Hashable, exp: float) -> None:
+        """Add key, which stops mattering once exp has passed"""
+        self._expiry[key] = exp
+        self._sequence += 1
+        heapq.heappush(self._heap, (exp, self._sequence, key))
+
+        while len(self._expiry) > self.max_size:
+            _, evicted_exp = self._pop_soonest()
+            logger.warning(
+                "Token blacklist is full (%d entries); evicted entry expiring at %s",
+                self.max_size, evicted_exp)
+
+        # Re-added keys leave stale heap entries behind; compact occasionally
+        if len(self._heap) > 2 * len(self._expiry) + 64:
+            self._heap = [(exp, seq, key) for seq, (key, exp)
+                          in enumerate(self._expiry.items())]
+            self._sequence = len(self._heap)
+            heapq.heapify(self._heap)
+
+    def discard(self, key: Hashable) -> None:
+        """Remove key if present"""
+        self._expiry.pop(key, None)
+
+    def remove_expired(self, now: float) -> int:
+        """Drop every entry whose expiry is at or before now
+
+        Args:
+            now (float): Current time as a UNIX timestamp
+
+        Returns:
+            int: Number of entries removed
+        """
+        removed = 0
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            exp, _, key = heapq.heappop(heap)
+            if self._expiry.get(key) == exp:
+                del self._expiry[key]
+                removed += 1
+        return removed
+
+    def _load(self, entries: Dict[Hashable, float]) -> None:
+        """Replace every entry with entries, mapping keys to expiry times"""
+        self._expiry = entries
+        self._heap = [(exp, seq, key) for seq, (key, exp) in enumerate(entries.items())]
+        self._sequence = len(self._heap)
+        heapq.heapify(self._heap)
+
+    def _peek_soonest(self) -> Optional[float]:
+        """Return the earliest expiry of the live entries, or None if empty"""
+        heap = self._heap
+        while heap and self._expiry.get(heap[0][2]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def _pop_soonest(self) -> Tuple[Hashable, float]:
+        """Remove and return the live entry with the earliest expiry"""
+        while True:
+            exp, _, key = heapq.heappop(self._heap)
+            if self._expiry.get(key) == exp:
+                del self._expiry[key]
+                return key, exp
+
+
+class ShardedBlacklist:
+    """Thread-safe TokenBlacklist split into independently locked shards
+
+    Keys are spread over the shards by hash; since ``hash()`` is salted per
+    process, unpickling buckets the entries again. Writers lock only the shard
+    they touch and readers take no lock at all, relying on single dict
+    lookups being atomic. Cleanup walks the shards one at a
+    time, so verification against the other shards is never blocked.
+
+    The size bound applies to the blacklist as a whole: once it is reached,
+    the entry that expires soonest across all shards is evicted. Small
+    blacklists use fewer shards so that each keeps at least
+    ``MIN_SHARD_SIZE`` entries.
+
+    With ``filter_error_rate`` set, `filter_snapshot` serializes a Bloom
+    filter of the entries for workers that cannot reach the blacklist itself.
+    Lookups here never use it: the exact index is an in-memory dict, which
+    is cheaper to probe than the filter.
+
+    Args:
+        max_size (int): Maximum number of entries across all shards
+        filter_error_rate (Optional[float]): False-positive rate of the
+            snapshot Bloom filter, or None to disable snapshots
+        shards (int): Number of shards
+
+    Example:
+        >>> blacklist = ShardedBlacklist(max_size=100000, shards=16)
+        >>> blacklist.add(token, exp=1700000000)
+        >>> token in blacklist
+        True
+    """
+
+    MIN_SHARD_SIZE = 64
+
+    def __init__(self, max_size: int, filter_error_rate: Optional[float] = None, shards: int = 16):
+        self.max_size = max_size
+        self.filter_error_rate = filter_error_rate
+        count = max(1, min(shards, max_size // self.MIN_SHARD_SIZE))
+        # Shards never evict on their own; `add` enforces max_size globally
+        self._shards = [TokenBlacklist(max_size) for _ in range(count)]
+        self._locks = [threading.Lock() for _ in range(count)]
+        self._evict_lock = threading.Lock()
+
+    def _index(self, key: Hashable) -> int:
+        return hash(key) % len(self._shards)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._shards[self._index(key)]
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    @property
+    def shard_count(self) -> int:
+        return len(self._shards)
+
+    def add(self, key: Hashable, exp: float) -> None:
+        """Add key, which stops mattering once exp has passed"""
+        index = self._index(key)
+        with self._locks[index]:
+            self._shards[index].add(key, exp)
+        if len(self) > self.max_size:
+            self._evict_soonest()
+
+    def _evict_soonest(self) -> None:
+        """Evict the soonest-expiring entries until max_size holds again"""
+        with self._evict_lock:
+            while len(self) > self.max_size:
+                soonest: Optional[Tuple[float, int]] = None
+                for index, (shard, lock) in enumerate(zip(self._shards, self._locks)):
+                    with lock:
+                        exp = shard._peek_soonest()
+                    if exp is not None and (soonest is None or exp < soonest[0]):
+                        soonest = (exp, index)
+                if soonest is None:
+                    return
+                index = soonest[1]
+                with self._locks[index]:
+                    shard = self._shards[index]
+                    if not shard._expiry:
+                        continue
+                    _, evicted_exp = shard._pop_soonest()
+                logger.warning(
+                    "Token blacklist is full (%d entries); evicted entry expiring at %s",
+                    self.max_size, evicted_exp)
+
+    def discard(self, key: Hashable) -> None:
+        """Remove key if present"""
+        index = self._index(key)
+        with self._locks[index]:
+            self._shards[index].discard(key)
+
+    def remove_expired(self, now: float) -> int:
+        """Drop expired entries, locking one shard at a time
+
+        Args:
+            now (float): Current time as a UNIX timestamp
+
+        Returns:
+            int: Number of entries removed
+        """
+        removed = 0
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                removed += shard.remove_expired(now)
+        return removed
+
+    def filter_snapshot(self) -> Optional[bytes]:
+        """Build and serialize a Bloom filter of every entry, or None if disabled"""
+        if not self.filter_error_rate:
+            return None
+        keys: List[Hashable] = []
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                keys.extend(shard._expiry)
+        return BloomFilter.from_keys(keys, self.max_size, self.filter_error_rate).to_bytes()
+
+    def __getstate__(self) -> Dict[str, object]:
+        state = self.__dict__.copy()
+        del state["_locks"]
+        del state["_evict_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, object]) -> None:
+        self.__dict__.update(state)
+        # hash() differs in this process, so keys may belong to other shards
+        buckets: List[Dict[Hashable, float]] = [{} for _ in self._shards]
+        for shard in self._shards:
+            for key, exp in shard._expiry.items():
+                buckets[self._index(key)][key] = exp
+        for shard, entries in zip(self._shards, buckets):
+            shard._load(entries)
+        self._locks = [threading.Lock() for _ in self._shards]
+        self._evict_lock = threading.Lock()
@@ -0,0 +1,87 @@
+import hashlib
+import math
+import struct
+from typing import Hashable, Iterable
+
+from .exceptions import JWTError
+
+_HEADER = struct.Struct(">4sQQ")
+_MAGIC = b"JBF1"
+
+
+class BloomFilter:
+    """Probabilistic set membership with a bounded false-positive rate
+
+    A negative answer is always correct; a positive answer is wrong with
+    probability close to ``error_rate`` while the filter holds at most
+    ``capacity`` keys.
+
+    Args:
+        capacity (int): Expected maximum number of keys
+        error_rate (float): Target false-positive rate
+
+    Example:
+        >>> bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        >>> bloom.add(b"key")
+        >>> b"key" in bloom
+        True
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(1, capacity)
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    @classmethod
+    def from_keys(cls, keys: Iterable[Hashable], capacity: int, error_rate: float) -> "BloomFilter":
+        """Build a filter holding every key in keys"""
+        bloom = cls(capacity, error_rate)
+        for key in keys:
+            bloom.add(key)
+        return bloom
+
+    def _positions(self, key: Hashable):
+        data = key if isinstance(key, bytes) else str(key).encode("utf-8")
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        num_bits = self.num_bits
+        return [(h1 + i * h2) % num_bits for i in range(self.num_hashes)]
+
+    def add(self, key: Hashable) -> None:
+        bits = self._bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: Hashable) -> bool:
+        bits = self._bits
+        for position in self._positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def to_bytes(self) -> bytes:
+        """Serialize the filter so another process can load it with `from_bytes`"""
+        return _HEADER.pack(_MAGIC, self.num_bits, self.num_hashes) + bytes(self._bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        """Load a filter serialized by `to_bytes`
+
+        Raises:
+            JWTError: If data is not a serialized filter
+        """
+        try:
+            magic, num_bits, num_hashes = _HEADER.unpack_from(data)
+        except struct.error:
+            raise JWTError("Invalid Bloom filter snapshot")
+        bits = data[_HEADER.size:]
+        if magic != _MAGIC or len(bits) != (num_bits + 7) // 8:
+            raise JWTError("Invalid Bloom filter snapshot")
+
+        bloom = cls.__new__(cls)
+        bloom.num_bits = num_bits
+        bloom.num_hashes = num_hashes
+        bloom._bits = bytearray(bits)
+        return bloom
@@ -0,0 +1,155 @@
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+def token_digest(token: str) -> bytes:
+    """Return a fixed-size digest of a token for use as a cache key
+
+    Args:
+        token (str): Encoded JWT
+
+    Returns:
+        bytes: SHA-256 digest of the token
+    """
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire at a per-entry deadline
+
+    Entries are evicted in least-recently-used order once ``maxsize`` is
+    reached, and are dropped on lookup once their deadline has passed.
+
+    Args:
+        maxsize (int): Maximum number of entries
+        ttl (Optional[float]): Upper bound in seconds on the lifetime of an entry
+
+    Example:
+        >>> cache = TTLCache(maxsize=1024, ttl=60)
+        >>> cache.set("key", {"user_id": 1}, expires_at=time.time() + 30)
+        >>> cache.get("key")
+        {'user_id': 1}
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if absent or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None) -> None:
+        """Store value under key until expires_at (capped by the cache ttl)"""
+        now = time.time()
+        if self.ttl is not None:
+            deadline = now + self.ttl
+            expires_at = deadline if expires_at is None else min(expires_at, deadline)
+        if expires_at is None or expires_at <= now:
+            return
+
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """Remove key from the cache if present"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and current occupancy"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+
+class FailureCache(TTLCache):
+    """TTLCache of verification failures, counting hits per error reason
+
+    Each entry holds the error a token failed with and the key set version
+    it failed against, so that a key added later is not masked by a stale
+    "Unknown key id" or signature failure.
+
+    Args:
+        maxsize (int): Maximum number of entries
+        ttl (float): Lifetime of an entry in seconds
+
+    Example:
+        >>> failures = FailureCache(maxsize=1024, ttl=30)
+        >>> failures.record(key, JWTError("Token has expired"), version=0)
+        >>> failures.lookup(key, version=0)
+        JWTError('Token has expired')
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize, ttl)
+        self.reasons: "Counter[str]" = Counter()
+
+    def record(self, key: Hashable, error: Exception, version: Hashable) -> None:
+        """Remember that the token under key failed with error"""
+        self.set(key, (version, error))
+
+    def lookup(self, key: Hashable, version: Hashable) -> Optional[Exception]:
+        """Return the error recorded for key, or None if absent or stale"""
+        entry = self.get(key)
+        if entry is None:
+            return None
+
+        recorded_version, error = entry
+        if recorded_version != version:
+            self.pop(key)
+            return None
+
+        with self._lock:
+            self.reasons[str(error)] += 1
+        return error
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters"""
+        super().clear()
+        with self._lock:
+            self.reasons.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters, occupancy and hits per error reason"""
+        stats: Dict[str, Any] = dict(super().stats())
+        with self._lock:
+            stats["reasons"] = dict(self.reasons)
+        return stats
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Callable, Optional
 from .exceptions import JWTConfigurationError
 
 
@@ -15,14 +15,33 @@ class TokenConfig:
     refresh_token_expiry (int): The expiry time for the refresh token in seconds. Default is 86400
     issuer (str): The issuer of the JWT token. Default is None.
     audience (str): The audience of the JWT token. Default is None.
-    private_key (bytes): The private key used for RS256 algorithm. Default is None.
-    public_key (bytes): The public key used for RS256 algorithm. Default is None.
+    private_key (bytes): The private key used for RS*, ES* and EdDSA algorithms. Default is None.
+    public_key (bytes): The public key used for RS*, ES* and EdDSA algorithms. Default is None.
+    key_id (str): The kid header written to tokens signed with these keys. Default is None (no kid header).
     min_key_size (int): The minimum key size for the RSA algorithm. Default is 2048 bits.
+    keystore_path (str): File used to persist a generated key pair when private_key and public_key are not given. Default is None (generate a new pair in memory).
     max_blacklist_size (int): The maximum size of the token blacklist. Default is 1000.
+    blacklist_filter_error_rate (float): False-positive rate of the Bloom filter built by blacklist_filter_snapshot() for workers that cannot reach the blacklist. Default is None (disabled).
+    blacklist_shards (int): Number of independently locked blacklist shards. Default is 16.
+    use_jti (bool): Whether to add a random jti claim to every token so revocation is tracked by jti. Default is False.
+    revocation_sync_interval (float): Seconds between pulls from a shared revocation store. Default is 5.0; 0 disables the background sync.
+    cache_size (int): The maximum number of verified payloads kept by verify_token. Default is 0 (disabled).
+    cache_ttl (int): The maximum lifetime of a cached payload in seconds. Default is None (until the token expires).
+    negative_cache_size (int): The maximum number of failed tokens whose error verify_token remembers. Default is 0 (disabled).
+    negative_cache_ttl (float): How long a failed token's error is remembered, in seconds. Default is 30.
+    json_serializer (Callable): Function serializing the token payload to compact JSON bytes, e.g. orjson.dumps. Default is None (stdlib json, byte-identical to PyJWT).
+    max_token_size (int): The longest token verify_token will decode, in characters. Default is 8192; 0 disables the limit.
 
     Raises:
     JWTConfigurationError: If the secret_key is not provided or if the algorithm is not supported.
     JWTConfigurationError: If the access_token_expiry is not positive or if the refresh_token_expiry is less than access_token_expiry.
+    JWTConfigurationError: If the max_blacklist_size is not positive.
+    JWTConfigurationError: If the blacklist_filter_error_rate is not between 0 and 1.
+    JWTConfigurationError: If the blacklist_shards is not positive.
+    JWTConfigurationError: If the revocation_sync_interval is negative.
+    JWTConfigurationError: If the cache_size is negative or if the cache_ttl is not positive.
+    JWTConfigurationError: If the negative_cache_size is negative or if the negative_cache_ttl is not positive.
+    JWTConfigurationError: If the max_token_size is negative.
 
     """
     secret_key: str
@@ -33,15 +52,28 @@ class TokenConfig:
     audience: Optional[str] = None
     private_key: Optional[bytes] = None
     public_key: Optional[bytes] = None
+    key_id: Optional[str] = None
     min_key_size: int = 2048
+    keystore_path: Optional[str] = None
     max_blacklist_size: int = 1000
+    blacklist_filter_error_rate: Optional[float] = None
+    blacklist_shards: int = 16
+    use_jti: bool = False
+    revocation_sync_interval: float = 5.0
+    cache_size: int = 0
+    cache_ttl: Optional[int] = None
+    negative_cache_size: int = 0
+    negative_cache_ttl: float = 30.0
+    json_serializer: Optional[Callable[[Any], bytes]] = None
+    max_token_size: int = 8192
 
     def __post_init__(self):
         if not self.secret_key:
             raise JWTConfigurationError("secret_key is required")
 
-        allowed_algorithms = ["HS256", "HS384",
-                              "HS512", "RS256", "RS384", "RS512"]
+        allowed_algorithms = ["HS256", "HS384", "HS512",
+                              "RS256", "RS384", "RS512",
+                              "ES256", "ES384", "EdDSA"]
         if self.algorithm not in allowed_algorithms:
             raise JWTConfigurationError(
                 f"Algorithm must be one of {allowed_algorithms}")
@@ -52,3 +84,31 @@ class TokenConfig:
         if self.refresh_token_expiry <= self.access_token_expiry:
             raise JWTConfigurationError(
                 "refresh_token_expiry must be greater than access_token_expiry")
+
+        if self.max_blacklist_size <= 0:
+            raise JWTConfigurationError("max_blacklist_size must be positive")
+
+        if self.blacklist_filter_error_rate is not None and not 0 < self.blacklist_filter_error_rate < 1:
+            raise JWTConfigurationError(
+                "blacklist_filter_error_rate must be between 0 and 1")
+
+        if self.blacklist_shards <= 0:
+            raise JWTConfigurationError("blacklist_shards must be positive")
+
+        if self.revocation_sync_interval < 0:
+            raise JWTConfigurationError("revocation_sync_interval must not be negative")
+
+        if self.cache_size < 0:
+            raise JWTConfigurationError("cache_size must not be negative")
+
+        if self.cache_ttl is not None and self.cache_ttl <= 0:
+            raise JWTConfigurationError("cache_ttl must be positive")
+
+        if self.negative_cache_size < 0:
+            raise JWTConfigurationError("negative_cache_size must not be negative")
+
+        if self.negative_cache_ttl <= 0:
+            raise JWTConfigurationError("negative_cache_ttl must be positive")
+
+        if self.max_token_size < 0:
+            raise JWTConfigurationError("max_token_size must not be negative")
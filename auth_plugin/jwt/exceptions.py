@@ -7,6 +7,16 @@ class JWTError(Exception):
         self.error_code = error_code
         super().__init__(self.message)
 
+    def __reduce__(self):
+        # Keep error_code intact when errors cross process boundaries
+        return _restore_error, (self.__class__, self.message, self.error_code)
+
+
+def _restore_error(cls, message: str, error_code: str) -> JWTError:
+    error = cls.__new__(cls)
+    JWTError.__init__(error, message, error_code)
+    return error
+
 
 class JWTTokenExpiredError(JWTError):
     def __init__(self, message: str = "Token has expired"):
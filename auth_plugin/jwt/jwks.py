@@ -0,0 +1,236 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import requests
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import get_default_algorithms
+
+from .exceptions import JWTConfigurationError
+from .keyset import KeyEntry
+
+logger = logging.getLogger(__name__)
+
+# Algorithm assumed for keys published without an "alg" member
+_DEFAULT_ALGORITHMS = {
+    ("RSA", None): "RS256",
+    ("EC", "P-256"): "ES256",
+    ("EC", "P-384"): "ES384",
+    ("OKP", "Ed25519"): "EdDSA",
+}
+_SUPPORTED_ALGORITHMS = frozenset({"RS256", "RS384", "RS512", "ES256", "ES384", "EdDSA"})
+
+
+class JWKSClient:
+    """Verification keys fetched from a JSON Web Key Set endpoint
+
+    The key set is fetched once on creation and parsed into memory, indexed
+    by ``kid``; a daemon thread fetches it again every ``refresh_interval``
+    seconds and swaps in the new keys. A lookup of an unknown ``kid``
+    triggers one immediate fetch, at most once every
+    ``min_refetch_interval`` seconds, so tokens signed with a freshly
+    rotated key verify while made-up key ids cannot flood the provider.
+    Symmetric keys and keys not meant for signatures are ignored.
+
+    Pass the client to `JWTAuthPlugin` to verify tokens issued by an
+    external provider.
+
+    Args:
+        url (str): JWKS endpoint, e.g. ``https://issuer/.well-known/jwks.json``
+        refresh_interval (float): Seconds between background fetches; 0
+            disables the background thread
+        min_refetch_interval (float): Minimum seconds between fetches
+            triggered by unknown key ids
+        timeout (float): Connect and read timeout of a fetch, in seconds
+        min_key_size (int): Smallest RSA key size accepted, in bits
+        session (Optional[requests.Session]): Session to fetch with instead
+            of a private one. It is not closed by `close`.
+
+    Raises:
+        JWTConfigurationError: If the first fetch fails
+
+    Example:
+        >>> jwks = JWKSClient("https://issuer.example.com/.well-known/jwks.json")
+        >>> auth = JWTAuthPlugin(config, jwks=jwks)
+        >>> claims = auth.verify_token(provider_token, token_type=None)
+    """
+
+    def __init__(
+        self,
+        url: str,
+        refresh_interval: float = 300.0,
+        min_refetch_interval: float = 30.0,
+        timeout: float = 5.0,
+        min_key_size: int = 2048,
+        session: Optional[requests.Session] = None
+    ):
+        if refresh_interval < 0 or min_refetch_interval < 0:
+            raise JWTConfigurationError(
+                "refresh_interval and min_refetch_interval must not be negative")
+        if timeout <= 0:
+            raise JWTConfigurationError("timeout must be positive")
+
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.min_refetch_interval = min_refetch_interval
+        self.timeout = timeout
+        self.min_key_size = min_key_size
+        self._owns_session = session is None
+        self._session = session or requests.Session()
+        self._entries: Dict[Optional[str], KeyEntry] = {}
+        self._jwks: List[Dict[str, Any]] = []
+        self._version = 0
+        self._last_fetch = float("-inf")
+        self._fetch_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        try:
+            self.refresh()
+        except Exception as e:
+            self.close()
+            raise JWTConfigurationError(f"Failed to fetch JWKS from {url}: {str(e)}")
+
+        if refresh_interval > 0:
+            self._thread = threading.Thread(
+                target=self._refresh_loop, name="jwt-jwks-refresh", daemon=True)
+            self._thread.start()
+
+    def __contains__(self, kid: Optional[str]) -> bool:
+        return kid in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def version(self) -> int:
+        """Counter bumped whenever a fetch changes the key set"""
+        return self._version
+
+    def get(self, kid: Optional[str], refetch: bool = True) -> Optional[KeyEntry]:
+        """Return the key registered under kid, or None
+
+        A token without a ``kid`` header matches the only key of a
+        single-key set.
+
+        Args:
+            kid (Optional[str]): Key id from the token header
+            refetch (bool): Fetch the key set again if kid is unknown and the
+                last fetch is older than ``min_refetch_interval``
+        """
+        entries = self._entries
+        entry = entries.get(kid)
+        if entry is None and kid is None and len(entries) == 1:
+            entry = next(iter(entries.values()))
+        if entry is not None or not refetch or not self._refetch_allowed():
+            return entry
+
+        with self._fetch_lock:
+            # Another thread may have fetched while this one waited
+            if kid not in self._entries and self._refetch_allowed():
+                try:
+                    self._fetch()
+                except Exception as e:
+                    logger.warning(f"JWKS refetch for unknown key id failed: {str(e)}")
+        return self.get(kid, refetch=False)
+
+    def refresh(self) -> None:
+        """Fetch the key set now and swap in its keys
+
+        Raises:
+            requests.RequestException: If the endpoint cannot be reached
+            ValueError: If the response is not a JWKS document
+        """
+        with self._fetch_lock:
+            self._fetch()
+
+    def close(self) -> None:
+        """Stop the background refresh and close the private session"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._owns_session and self._session is not None:
+            self._session.close()
+
+    def _refetch_allowed(self) -> bool:
+        return time.monotonic() - self._last_fetch >= self.min_refetch_interval
+
+    def _fetch(self) -> None:
+        """Download and parse the key set; callers hold the fetch lock"""
+        self._last_fetch = time.monotonic()
+        response = self._session.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        document = response.json()
+        keys = document.get("keys") if isinstance(document, dict) else None
+        if not isinstance(keys, list):
+            raise ValueError("Response is not a JWKS document")
+
+        if keys == self._jwks:
+            return
+        self._entries = self._parse(keys)
+        self._jwks = keys
+        self._version += 1
+
+    def _parse(self, keys: List[Any]) -> Dict[Optional[str], KeyEntry]:
+        algorithms = get_default_algorithms()
+        entries: Dict[Optional[str], KeyEntry] = {}
+        for jwk in keys:
+            if not isinstance(jwk, dict) or jwk.get("use", "sig") != "sig":
+                continue
+            kid = jwk.get("kid")
+            algorithm = jwk.get("alg") or _DEFAULT_ALGORITHMS.get(
+                (jwk.get("kty"), jwk.get("crv")))
+            if algorithm not in _SUPPORTED_ALGORITHMS:
+                # Unsupported and symmetric ("oct") keys
+                continue
+            try:
+                key = algorithms[algorithm].from_jwk(jwk)
+            except Exception as e:
+                logger.warning(f"Skipping JWKS key {kid!r}: {str(e)}")
+                continue
+            if not hasattr(key, "verify"):
+                # A private JWK; verification only needs its public half
+                key = key.public_key()
+            if isinstance(key, rsa.RSAPublicKey) and key.key_size < self.min_key_size:
+                logger.warning(f"Skipping JWKS key {kid!r}: RSA key size {key.key_size} "
+                               f"is below the minimum of {self.min_key_size} bits")
+                continue
+            entries[kid] = KeyEntry(kid, algorithm, None, key)
+        return entries
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep verifying with the keys already loaded
+                logger.error(f"JWKS refresh failed: {str(e)}")
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Worker processes get a snapshot of the keys without a refresh thread
+        return {
+            "url": self.url,
+            "refresh_interval": self.refresh_interval,
+            "min_refetch_interval": self.min_refetch_interval,
+            "timeout": self.timeout,
+            "min_key_size": self.min_key_size,
+            "jwks": self._jwks,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.url = state["url"]
+        self.refresh_interval = state["refresh_interval"]
+        self.min_refetch_interval = state["min_refetch_interval"]
+        self.timeout = state["timeout"]
+        self.min_key_size = state["min_key_size"]
+        self._owns_session = True
+        self._session = requests.Session()
+        self._jwks = state["jwks"]
+        self._entries = self._parse(self._jwks)
+        self._version = 0
+        self._last_fetch = float("-inf")
+        self._fetch_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
@@ -0,0 +1,254 @@
+import json
+import threading
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional
+
+from cryptography.hazmat.primitives import serialization
+from jwt.algorithms import get_default_algorithms
+
+from .exceptions import JWTConfigurationError
+from .utils import load_keys
+
+
+class KeyEntry(NamedTuple):
+    """Parsed key material for one kid"""
+    kid: Optional[str]
+    algorithm: str
+    signing_key: Any
+    verification_key: Any
+
+
+class KeySet:
+    """Signing and verification keys indexed by kid
+
+    One key is active and signs new tokens; every other key in the set still
+    verifies the tokens it signed until it is retired. Lookups are a single
+    dict access. Updates build a new dict and swap it in, so readers never
+    take a lock and `reload` replaces the whole set atomically.
+
+    Args:
+        algorithm (str): Default algorithm for keys added without one
+        min_key_size (int): Smallest RSA key size accepted, in bits
+
+    Example:
+        >>> keyset = KeySet("RS256")
+        >>> keyset.add("2024-01", private_key=old_private, public_key=old_public)
+        >>> keyset.add("2024-06", private_key=new_private, public_key=new_public, activate=True)
+        >>> keyset.retire("2024-01")
+    """
+
+    def __init__(self, algorithm: str, min_key_size: int = 0):
+        self.algorithm = algorithm
+        self.min_key_size = min_key_size
+        self._entries: Dict[Optional[str], KeyEntry] = {}
+        self._sources: Dict[Optional[str], Dict[str, Any]] = {}
+        self._active_kid: Optional[str] = None
+        self._version = 0
+        self._write_lock = threading.Lock()
+
+    def __contains__(self, kid: Optional[str]) -> bool:
+        return kid in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def active_kid(self) -> Optional[str]:
+        return self._active_kid
+
+    @property
+    def version(self) -> int:
+        """Counter bumped whenever the set of verification keys changes"""
+        return self._version
+
+    def get(self, kid: Optional[str]) -> Optional[KeyEntry]:
+        """Return the key registered under kid, or None"""
+        return self._entries.get(kid)
+
+    def active(self) -> KeyEntry:
+        """Return the key that signs new tokens
+
+        Raises:
+            JWTConfigurationError: If no active key can sign
+        """
+        entry = self._entries.get(self._active_kid)
+        if entry is None or entry.signing_key is None:
+            raise JWTConfigurationError("Key set has no active signing key")
+        return entry
+
+    def add(
+        self,
+        kid: Optional[str],
+        private_key: Optional[bytes] = None,
+        public_key: Optional[bytes] = None,
+        secret_key: Optional[str] = None,
+        algorithm: Optional[str] = None,
+        activate: bool = False
+    ) -> None:
+        """Add or replace the key registered under kid
+
+        Args:
+            kid (Optional[str]): Key id written to the ``kid`` header. None
+                registers the key for tokens without a ``kid`` header.
+            private_key (Optional[bytes]): PEM private key; omit for
+                verification-only keys
+            public_key (Optional[bytes]): PEM public key
+            secret_key (Optional[str]): Shared secret for HS* algorithms
+            algorithm (Optional[str]): Algorithm of this key
+            activate (bool): Sign new tokens with this key
+
+        Raises:
+            JWTConfigurationError: If the key material cannot be loaded
+        """
+        source = {
+            "private_key": private_key,
+            "public_key": public_key,
+            "secret_key": secret_key,
+            "algorithm": algorithm or self.algorithm,
+        }
+        entry = self._load(kid, source)
+        with self._write_lock:
+            self._entries = {**self._entries, kid: entry}
+            self._sources = {**self._sources, kid: source}
+            self._version += 1
+            if activate or self._active_kid not in self._entries:
+                self._active_kid = kid
+
+    def activate(self, kid: Optional[str]) -> None:
+        """Sign new tokens with the key registered under kid"""
+        if kid not in self._entries:
+            raise JWTConfigurationError(f"Unknown key id: {kid}")
+        self._active_kid = kid
+
+    def retire(self, kid: Optional[str]) -> None:
+        """Remove a key so the tokens it signed no longer verify
+
+        Raises:
+            JWTConfigurationError: If kid is the active key
+        """
+        with self._write_lock:
+            if kid == self._active_kid:
+                raise JWTConfigurationError("Cannot retire the active key")
+            entries = dict(self._entries)
+            sources = dict(self._sources)
+            entries.pop(kid, None)
+            sources.pop(kid, None)
+            self._entries = entries
+            self._sources = sources
+            self._version += 1
+
+    def reload(self, keys: Iterable[Mapping[str, Any]], active_kid: Optional[str]) -> None:
+        """Replace every key at once
+
+        Args:
+            keys (Iterable[Mapping[str, Any]]): Mappings with a ``kid`` and
+                the keyword arguments of `add`
+            active_kid (Optional[str]): Key that signs new tokens
+
+        Raises:
+            JWTConfigurationError: If a key cannot be loaded or active_kid is
+            not among keys
+        """
+        entries = {}
+        sources = {}
+        for key in keys:
+            key = dict(key)
+            kid = key.pop("kid", None)
+            source = {
+                "private_key": key.get("private_key"),
+                "public_key": key.get("public_key"),
+                "secret_key": key.get("secret_key"),
+                "algorithm": key.get("algorithm") or self.algorithm,
+            }
+            entries[kid] = self._load(kid, source)
+            sources[kid] = source
+
+        if active_kid not in entries:
+            raise JWTConfigurationError(f"Unknown key id: {active_kid}")
+
+        with self._write_lock:
+            self._entries = entries
+            self._sources = sources
+            self._active_kid = active_kid
+            self._version += 1
+
+    def verification_copy(self) -> "KeySet":
+        """Return a copy of the set without private keys
+
+        Asymmetric keys keep only their public half, so the copy verifies
+        every token the set verifies but signs none. Shared secrets are kept
+        because HS* verification needs them. Pickle the copy to hand keys to
+        processes that only verify.
+
+        Returns:
+            KeySet: Verification-only copy sharing the parsed public keys
+        """
+        entries: Dict[Optional[str], KeyEntry] = {}
+        sources: Dict[Optional[str], Dict[str, Any]] = {}
+        with self._write_lock:
+            current = self._entries, self._sources, self._active_kid
+        for kid, entry in current[0].items():
+            source = current[1][kid]
+            if source["private_key"]:
+                public_key = source["public_key"] or entry.verification_key.public_bytes(
+                    serialization.Encoding.PEM,
+                    serialization.PublicFormat.SubjectPublicKeyInfo)
+                source = {**source, "private_key": None, "public_key": public_key}
+                entry = entry._replace(signing_key=None)
+            entries[kid] = entry
+            sources[kid] = source
+
+        keyset = KeySet(self.algorithm, self.min_key_size)
+        keyset._entries = entries
+        keyset._sources = sources
+        keyset._active_kid = current[2]
+        return keyset
+
+    def to_jwks(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Export the public keys as a JSON Web Key Set
+
+        Shared secrets are never exported, so HS* keys are omitted.
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: JWKS document
+        """
+        algorithms = get_default_algorithms()
+        keys = []
+        for entry in self._entries.values():
+            if entry.algorithm.startswith("HS"):
+                continue
+            jwk = algorithms[entry.algorithm].to_jwk(entry.verification_key, as_dict=True)
+            if isinstance(jwk, str):
+                jwk = json.loads(jwk)
+            jwk.update({"alg": entry.algorithm, "use": "sig"})
+            if entry.kid is not None:
+                jwk["kid"] = entry.kid
+            keys.append(jwk)
+        return {"keys": keys}
+
+    def _load(self, kid: Optional[str], source: Dict[str, Any]) -> KeyEntry:
+        signing_key, verification_key = load_keys(
+            source["algorithm"],
+            source["secret_key"],
+            source["private_key"],
+            source["public_key"],
+            self.min_key_size
+        )
+        return KeyEntry(kid, source["algorithm"], signing_key, verification_key)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Parsed keys and locks do not pickle; reload from the PEM sources
+        return {
+            "algorithm": self.algorithm,
+            "min_key_size": self.min_key_size,
+            "sources": self._sources,
+            "active_kid": self._active_kid,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.algorithm = state["algorithm"]
+        self.min_key_size = state["min_key_size"]
+        self._sources = state["sources"]
+        self._entries = {kid: self._load(kid, source) for kid, source in self._sources.items()}
+        self._active_kid = state["active_kid"]
+        self._version = 0
+        self._write_lock = threading.Lock()
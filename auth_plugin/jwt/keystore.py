@@ -0,0 +1,154 @@
+import logging
+import mmap
+import os
+import threading
+from typing import Optional, Tuple
+
+from .exceptions import JWTConfigurationError
+from .utils import generate_keys
+
+logger = logging.getLogger(__name__)
+
+_PUBLIC_MARKER = b"-----BEGIN PUBLIC KEY-----"
+
+
+class KeyStore:
+    """File-backed signing key pair shared by every worker on a host
+
+    The first process to start generates a key pair and publishes it
+    atomically with owner-only permissions; every later start, and every
+    other worker, loads the same pair instead of generating its own. The
+    next rotation key can be generated in the background ahead of time.
+
+    Args:
+        path (str): File holding the private and public key in PEM format
+        key_size (int): Size of generated RSA keys in bits
+        min_key_size (int): Smallest RSA key size accepted when generating
+        algorithm (str): Algorithm the generated keys are for
+
+    Example:
+        >>> private_key, public_key = KeyStore("/var/lib/app/jwt.pem").load_or_create()
+    """
+
+    def __init__(
+        self,
+        path: str,
+        key_size: int = 2048,
+        min_key_size: int = 2048,
+        algorithm: str = "RS256"
+    ):
+        self.path = os.path.abspath(path)
+        self.key_size = key_size
+        self.min_key_size = min_key_size
+        self.algorithm = algorithm
+        self._next_thread: Optional[threading.Thread] = None
+
+    @property
+    def next_path(self) -> str:
+        return self.path + ".next"
+
+    def load_or_create(self) -> Tuple[bytes, bytes]:
+        """Load the key pair, generating and persisting it on first use
+
+        Returns:
+            Tuple[bytes, bytes]: Private and public keys in PEM format
+
+        Raises:
+            JWTConfigurationError: If the key file cannot be read or written
+        """
+        try:
+            return self._read(self.path)
+        except FileNotFoundError:
+            pass
+
+        keys = self._take_next() or self._generate()
+        if self._publish(self.path, keys):
+            logger.info(f"Generated {self.algorithm} key pair at {self.path}")
+            return keys
+        # Another worker published first; use its keys so tokens interoperate
+        return self._read(self.path)
+
+    def prepare_next(self) -> threading.Thread:
+        """Generate the next rotation key pair in a background thread
+
+        Returns:
+            threading.Thread: The generating thread; already running
+        """
+        if self._next_thread is None or not self._next_thread.is_alive():
+            self._next_thread = threading.Thread(
+                target=self._generate_next, name="jwt-keygen", daemon=True)
+            self._next_thread.start()
+        return self._next_thread
+
+    def rotate(self) -> Tuple[bytes, bytes]:
+        """Replace the current key pair with the prepared next pair
+
+        Generates the next pair synchronously if `prepare_next` was not called.
+
+        Returns:
+            Tuple[bytes, bytes]: The new private and public keys
+        """
+        if self._next_thread is not None:
+            self._next_thread.join()
+        if not os.path.exists(self.next_path):
+            self._generate_next()
+
+        keys = self._read(self.next_path)
+        os.replace(self.next_path, self.path)
+        return keys
+
+    def _generate_next(self) -> None:
+        try:
+            self._publish(self.next_path, self._generate())
+        except Exception as e:
+            logger.error(f"Background key generation failed: {str(e)}")
+
+    def _generate(self) -> Tuple[bytes, bytes]:
+        return generate_keys(self.algorithm, self.key_size, self.min_key_size)
+
+    def _take_next(self) -> Optional[Tuple[bytes, bytes]]:
+        """Claim a pre-generated pair, if one is ready"""
+        try:
+            keys = self._read(self.next_path)
+            os.unlink(self.next_path)
+            return keys
+        except FileNotFoundError:
+            return None
+
+    def _publish(self, path: str, keys: Tuple[bytes, bytes]) -> bool:
+        """Atomically create path holding keys; False if it already exists"""
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(keys[0] + keys[1])
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.link(tmp_path, path)
+                return True
+            except FileExistsError:
+                return False
+            finally:
+                os.unlink(tmp_path)
+        except OSError as e:
+            raise JWTConfigurationError(f"Failed to write key file {path}: {str(e)}")
+
+    @staticmethod
+    def _read(path: str) -> Tuple[bytes, bytes]:
+        try:
+            with open(path, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    split = data.find(_PUBLIC_MARKER)
+                    if split <= 0:
+                        raise JWTConfigurationError(f"Invalid key file: {path}")
+                    return data[:split], data[split:]
+        except ValueError:
+            # mmap refuses empty files
+            raise JWTConfigurationError(f"Invalid key file: {path}")
+        except FileNotFoundError:
+            raise
+        except OSError as e:
+            raise JWTConfigurationError(f"Failed to read key file {path}: {str(e)}")
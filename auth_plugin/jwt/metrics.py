@@ -0,0 +1,200 @@
+import bisect
+import functools
+import inspect
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Optional, Sequence, Tuple
+
+from .exceptions import JWTError
+
+TOKENS_ISSUED = "jwt_tokens_issued_total"
+TOKENS_VERIFIED = "jwt_tokens_verified_total"
+FAILURES = "jwt_failures_total"
+TOKENS_BLACKLISTED = "jwt_tokens_blacklisted_total"
+CACHE_HITS = "jwt_cache_hits_total"
+DURATION = "jwt_operation_duration_seconds"
+
+_HELP = {
+    TOKENS_ISSUED: "Tokens signed",
+    TOKENS_VERIFIED: "Tokens that passed verification",
+    FAILURES: "Failed operations by error code",
+    TOKENS_BLACKLISTED: "Tokens added to the blacklist",
+    CACHE_HITS: "Verifications answered from a cache",
+    DURATION: "Latency of token operations",
+}
+
+Labels = Optional[Mapping[str, str]]
+
+
+class Metrics:
+    """Sink for plugin metrics; every method is a no-op
+
+    Subclass and override `increment` and `observe` to forward metrics to a
+    monitoring system, then pass an instance to `JWTAuthPlugin`. Without one
+    the plugin skips instrumentation entirely.
+
+    Example:
+        >>> class StatsdMetrics(Metrics):
+        ...     def increment(self, name, labels=None, amount=1):
+        ...         statsd.incr(name, amount)
+        >>> auth = JWTAuthPlugin(config, metrics=StatsdMetrics())
+    """
+
+    def increment(self, name: str, labels: Labels = None, amount: float = 1) -> None:
+        """Add amount to the counter name"""
+
+    def observe(self, name: str, value: float, labels: Labels = None) -> None:
+        """Record value, in seconds, in the histogram name"""
+
+
+def instrument(operation: str, counter: Optional[str] = None, amount: int = 1) -> Callable:
+    """Decorate a plugin method to record its latency, failures and successes
+
+    The instance's ``metrics`` attribute is read on every call; when it is
+    None the method is called directly.
+
+    Args:
+        operation (str): Value of the ``operation`` label
+        counter (Optional[str]): Counter incremented by amount on success
+        amount (int): Increment for counter
+    """
+    def decorator(method: Callable) -> Callable:
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(self, *args, **kwargs):
+                metrics = self.metrics
+                if metrics is None:
+                    return await method(self, *args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    result = await method(self, *args, **kwargs)
+                except JWTError as e:
+                    _record(metrics, operation, start, e)
+                    raise
+                _record(metrics, operation, start, None, counter, amount)
+                return result
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            metrics = self.metrics
+            if metrics is None:
+                return method(self, *args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = method(self, *args, **kwargs)
+            except JWTError as e:
+                _record(metrics, operation, start, e)
+                raise
+            _record(metrics, operation, start, None, counter, amount)
+            return result
+        return wrapper
+    return decorator
+
+
+def _record(
+    metrics: Metrics,
+    operation: str,
+    start: float,
+    error: Optional[JWTError],
+    counter: Optional[str] = None,
+    amount: int = 1
+) -> None:
+    metrics.observe(DURATION, time.perf_counter() - start, {"operation": operation})
+    if error is not None:
+        metrics.increment(FAILURES, {"operation": operation, "error_code": error.error_code})
+    elif counter is not None:
+        metrics.increment(counter, None, amount)
+
+
+class PrometheusMetrics(Metrics):
+    """In-process metrics rendered in the Prometheus text exposition format
+
+    Serve the output of `render` from a ``/metrics`` endpoint.
+
+    Args:
+        buckets (Sequence[float]): Upper bounds of the latency histogram
+            buckets, in seconds
+
+    Example:
+        >>> metrics = PrometheusMetrics()
+        >>> auth = JWTAuthPlugin(config, metrics=metrics)
+        >>> body = metrics.render()
+    """
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+    DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                       0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], list] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, labels: Labels = None, amount: float = 1) -> None:
+        key = (name, tuple(sorted(labels.items())) if labels else ())
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, labels: Labels = None) -> None:
+        key = (name, tuple(sorted(labels.items())) if labels else ())
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # Per-bucket counts, then +Inf, sum and count
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            histogram[index] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def value(self, name: str, labels: Labels = None) -> float:
+        """Return the current value of a counter, 0 if never incremented"""
+        key = (name, tuple(sorted(labels.items())) if labels else ())
+        return self._counters.get(key, 0)
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(value)) for key, value in self._histograms.items())
+
+        lines = []
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for (name, labels), histogram in histograms:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, histogram):
+                cumulative += count
+                bucket_labels = labels + (("le", bound),)
+                lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram[-2])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram[-1]}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: Any) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
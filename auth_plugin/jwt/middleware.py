@@ -0,0 +1,206 @@
+import json
+from typing import Any, Callable, Collection, Dict, Iterable, List, Optional, Tuple, Union
+
+from ..utils import parse_bearer_token
+from .aio import AsyncJWTAuthPlugin
+from .exceptions import JWTError, JWTInvalidTokenError
+from .plugin import JWTAuthPlugin
+
+_AUTHORIZATION = b"authorization"
+_MISSING_TOKEN = JWTError("Missing bearer token", "MISSING_TOKEN")
+
+
+def _header_error(raw: Union[str, bytes, None]) -> JWTError:
+    """Error for a request whose Authorization header holds no bearer token"""
+    return _MISSING_TOKEN if raw is None else JWTInvalidTokenError("Invalid authorization header")
+
+
+def _challenge(error: JWTError, realm: Optional[str]) -> str:
+    """Build the WWW-Authenticate value for a rejected request (RFC 6750)"""
+    params = [f'realm="{realm}"'] if realm else []
+    if error is not _MISSING_TOKEN:
+        params.append('error="invalid_token"')
+    return "Bearer " + ", ".join(params) if params else "Bearer"
+
+
+def _error_body(error: JWTError) -> bytes:
+    return json.dumps({"error": error.message, "error_code": error.error_code}).encode("utf-8")
+
+
+class ASGIAuthMiddleware:
+    """ASGI middleware that verifies the bearer token of each request
+
+    The ``authorization`` header is read straight from the raw header list in
+    the scope and the token is verified on the async path of
+    `AsyncJWTAuthPlugin`, so cache hits never leave the event loop. The
+    application receives a copy of the scope with the verified claims in
+    ``scope["auth"]``; when the server provides ``scope["state"]``, they are
+    stored in ``scope["state"]["auth"]`` as well. Rejected HTTP requests get
+    a 401 response with a ``WWW-Authenticate`` challenge; rejected websockets
+    are closed with code 1008.
+
+    Args:
+        app (Callable): ASGI application to wrap
+        auth (Union[AsyncJWTAuthPlugin, JWTAuthPlugin]): Plugin verifying the
+            tokens. A synchronous plugin is wrapped in an `AsyncJWTAuthPlugin`
+            whose thread pool is shut down once the application completes
+            the lifespan shutdown.
+        token_type (Optional[str]): Expected token type; None skips the
+            check, e.g. for tokens verified through a JWKS
+        exempt_paths (Collection[str]): Paths served without a token
+        optional (bool): Pass requests without an Authorization header
+            through with ``scope["auth"]`` set to None instead of rejecting
+            them. Invalid tokens are still rejected.
+        realm (Optional[str]): Realm reported in the challenge
+
+    Example:
+        >>> app = ASGIAuthMiddleware(app, AsyncJWTAuthPlugin(config), exempt_paths={"/health"})
+    """
+
+    def __init__(
+        self,
+        app: Callable,
+        auth: Union[AsyncJWTAuthPlugin, JWTAuthPlugin],
+        token_type: Optional[str] = "access",
+        exempt_paths: Collection[str] = (),
+        optional: bool = False,
+        realm: Optional[str] = None
+    ):
+        self.app = app
+        self._owns_auth = not isinstance(auth, AsyncJWTAuthPlugin)
+        self.auth = AsyncJWTAuthPlugin(auth) if self._owns_auth else auth
+        self.token_type = token_type
+        self.exempt_paths = frozenset(exempt_paths)
+        self.optional = optional
+        self.realm = realm
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        scope_type = scope["type"]
+        if scope_type == "lifespan" and self._owns_auth:
+            await self.app(scope, receive, self._closing_send(send))
+            return
+        if (scope_type != "http" and scope_type != "websocket") or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        raw = None
+        # Header names are lowercased by the server (ASGI spec)
+        for name, value in scope["headers"]:
+            if name == _AUTHORIZATION:
+                raw = value
+                break
+
+        if raw is None and self.optional:
+            claims = None
+        else:
+            token = parse_bearer_token(raw)
+            if token is None:
+                await self._reject(scope_type, send, _header_error(raw))
+                return
+            try:
+                claims = await self.auth.verify_token(token, self.token_type)
+            except JWTError as e:
+                await self._reject(scope_type, send, e)
+                return
+
+        state = scope.get("state")
+        if state is not None:
+            state["auth"] = claims
+        # Middleware must not modify the server's scope (ASGI spec)
+        await self.app({**scope, "auth": claims}, receive, send)
+
+    def _closing_send(self, send: Callable) -> Callable:
+        """Wrap the lifespan send so that shutdown closes the wrapper plugin"""
+        async def closing_send(message: Dict[str, Any]) -> None:
+            if message["type"] in ("lifespan.shutdown.complete", "lifespan.shutdown.failed"):
+                await self.auth.close()
+            await send(message)
+        return closing_send
+
+    async def _reject(self, scope_type: str, send: Callable, error: JWTError) -> None:
+        if scope_type == "websocket":
+            # Closing before accept makes the server answer the handshake with 403
+            await send({"type": "websocket.close", "code": 1008})
+            return
+        body = _error_body(error)
+        await send({
+            "type": "http.response.start",
+            "status": 401,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"www-authenticate", _challenge(error, self.realm).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+class WSGIAuthMiddleware:
+    """WSGI middleware that verifies the bearer token of each request
+
+    The token is taken from ``environ["HTTP_AUTHORIZATION"]`` and the
+    verified claims are stored in ``environ["auth_plugin.claims"]``.
+    Rejected requests get a 401 response with a ``WWW-Authenticate``
+    challenge.
+
+    Args:
+        app (Callable): WSGI application to wrap
+        auth (JWTAuthPlugin): Plugin verifying the tokens
+        token_type (Optional[str]): Expected token type; None skips the
+            check, e.g. for tokens verified through a JWKS
+        exempt_paths (Collection[str]): Paths served without a token
+        optional (bool): Pass requests without an Authorization header
+            through with the claims set to None instead of rejecting them.
+            Invalid tokens are still rejected.
+        realm (Optional[str]): Realm reported in the challenge
+
+    Example:
+        >>> app = WSGIAuthMiddleware(app, JWTAuthPlugin(config), exempt_paths={"/health"})
+    """
+
+    ENVIRON_KEY = "auth_plugin.claims"
+
+    def __init__(
+        self,
+        app: Callable,
+        auth: JWTAuthPlugin,
+        token_type: Optional[str] = "access",
+        exempt_paths: Collection[str] = (),
+        optional: bool = False,
+        realm: Optional[str] = None
+    ):
+        self.app = app
+        self.auth = auth
+        self.token_type = token_type
+        self.exempt_paths = frozenset(exempt_paths)
+        self.optional = optional
+        self.realm = realm
+
+    def __call__(self, environ: Dict[str, Any], start_response: Callable) -> Iterable[bytes]:
+        if environ.get("PATH_INFO", "") in self.exempt_paths:
+            return self.app(environ, start_response)
+
+        raw = environ.get("HTTP_AUTHORIZATION")
+        if raw is None and self.optional:
+            claims = None
+        else:
+            token = parse_bearer_token(raw)
+            if token is None:
+                return self._reject(start_response, _header_error(raw))
+            try:
+                claims = self.auth.verify_token(token, self.token_type)
+            except JWTError as e:
+                return self._reject(start_response, e)
+
+        environ[self.ENVIRON_KEY] = claims
+        return self.app(environ, start_response)
+
+    def _reject(self, start_response: Callable, error: JWTError) -> List[bytes]:
+        body = _error_body(error)
+        headers: List[Tuple[str, str]] = [
+            ("Content-Type", "application/json"),
+            ("Content-Length", str(len(body))),
+            ("WWW-Authenticate", _challenge(error, self.realm)),
+        ]
+        start_response("401 Unauthorized", headers)
+        return [body]
@@ -1,38 +1,215 @@
 import jwt
-import datetime
+import base64
+import binascii
+import copy
+import dataclasses
+import hashlib
 import logging
-from typing import Dict, Any, Tuple, Set
+import os
+import pickle
+import secrets
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import repeat
+from typing import TYPE_CHECKING, Dict, Any, Hashable, Iterable, Iterator, List, Optional, Tuple, Union
+from .blacklist import ShardedBlacklist
+from .cache import FailureCache, TTLCache, token_digest
 from .config import TokenConfig
-from .exceptions import JWTError
-from .utils import generate_rsa_keys
+from .encoder import TokenEncoder
+from .exceptions import (
+    JWTBlacklistedError,
+    JWTError,
+    JWTInvalidTokenError,
+    JWTSignatureError,
+    JWTTokenExpiredError
+)
+from .keystore import KeyStore
+from .metrics import CACHE_HITS, TOKENS_BLACKLISTED, TOKENS_ISSUED, TOKENS_VERIFIED, Metrics, instrument
+from .keyset import KeyEntry, KeySet
+from .prevalidation import decode_unverified, prevalidate
+from .utils import generate_keys, generate_rsa_keys, is_asymmetric
+
+if TYPE_CHECKING:
+    from .jwks import JWKSClient
+    from .revocation import RevocationStore
 
 logger = logging.getLogger(__name__)
 
+# Failures that recur for as long as the token and key set stay the same
+_CACHEABLE_FAILURES = frozenset({
+    "Invalid token format",
+    "Invalid token signature",
+    "Invalid token type",
+    "Token has expired",
+    "Token has been blacklisted",
+    "Unknown key id",
+})
+
+# Plugin rebuilt in a process pool worker from the state last sent to it,
+# keyed by the digest of that state
+_worker_plugin: Optional[Tuple[bytes, "JWTAuthPlugin"]] = None
+
+
+def _load_worker_plugin(payload: Tuple[bytes, bytes]) -> "JWTAuthPlugin":
+    """Return the plugin pickled into payload, unpickling it once per process
+
+    Every chunk of tasks carries the pickled plugin, but its keys are parsed
+    only when the state differs from the one this worker last received.
+    """
+    global _worker_plugin
+    digest, state = payload
+    if _worker_plugin is None or _worker_plugin[0] != digest:
+        plugin = JWTAuthPlugin.__new__(JWTAuthPlugin)
+        plugin.__setstate__(pickle.loads(state))
+        _worker_plugin = (digest, plugin)
+    return _worker_plugin[1]
+
+
+def _verify_in_worker(
+    payload: Tuple[bytes, bytes],
+    token: str,
+    token_type: Optional[str]
+) -> Union[Dict[str, Any], JWTError]:
+    return _load_worker_plugin(payload)._verify_or_error(token, token_type)
+
+
+def _generate_in_worker(
+    payload: Tuple[bytes, bytes],
+    user_data: Dict[str, Any],
+    now: int
+) -> Tuple[str, str]:
+    plugin = _load_worker_plugin(payload)
+    # The parent synced the config keys before pickling the state
+    return plugin._generate_pair(user_data, now, plugin.keyset.active())
+
+
+def _default_chunksize(executor: Executor, count: int) -> int:
+    """Split count items into about four tasks per process pool worker"""
+    workers = getattr(executor, "_max_workers", None) or os.cpu_count() or 1
+    return max(1, -(-count // (4 * workers)))
+
 
 class JWTAuthPlugin:
     """JWT Authentication Plugin"""
     MAX_BLACKLIST_SIZE: int = 1000
 
-    def __init__(self, config: TokenConfig):
+    def __init__(
+        self,
+        config: TokenConfig,
+        revocation_store: Optional["RevocationStore"] = None,
+        metrics: Optional[Metrics] = None,
+        jwks: Optional["JWKSClient"] = None
+    ):
         self.config = config
-        self._blacklisted_tokens: Set[str] = set()
-
-        if config.algorithm.startswith("RS") and (not config.private_key or not config.public_key):
-            private_key, public_key = self.generate_rsa_keys()
+        self.metrics = metrics
+        self.jwks = jwks
+        self._blacklisted_tokens = ShardedBlacklist(
+            config.max_blacklist_size, config.blacklist_filter_error_rate,
+            config.blacklist_shards)
+        self._verified_cache: Optional[TTLCache] = (
+            TTLCache(config.cache_size, config.cache_ttl)
+            if config.cache_size else None
+        )
+        self._failed_cache: Optional[FailureCache] = (
+            FailureCache(config.negative_cache_size, config.negative_cache_ttl)
+            if config.negative_cache_size else None
+        )
+
+        if is_asymmetric(config.algorithm) and (not config.private_key or not config.public_key):
+            if config.keystore_path:
+                keystore = KeyStore(
+                    config.keystore_path, config.min_key_size, config.min_key_size,
+                    algorithm=config.algorithm)
+                private_key, public_key = keystore.load_or_create()
+            else:
+                private_key, public_key = generate_keys(
+                    config.algorithm, config.min_key_size, config.min_key_size)
             self.config.private_key = private_key
             self.config.public_key = public_key
 
+        self.keyset = KeySet(config.algorithm, config.min_key_size)
+        self._encoder = TokenEncoder(config.json_serializer)
+        self._key_source: Optional[Tuple[Any, ...]] = None
+        self._sync_config_keys()
+
+        self._revocation_store = revocation_store
+        self._revocation_cursor: Optional[float] = None
+        self._sync_stop = threading.Event()
+        self._sync_thread: Optional[threading.Thread] = None
+        if revocation_store is not None:
+            self.sync_revocations()
+            if config.revocation_sync_interval > 0:
+                self._sync_thread = threading.Thread(
+                    target=self._sync_loop, name="jwt-revocation-sync", daemon=True)
+                self._sync_thread.start()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Caches hold locks and are rebuilt empty in worker processes; workers
+        # keep a snapshot of the blacklist but do not sync with the store or
+        # report metrics
+        state = self.__dict__.copy()
+        state["_verified_cache"] = None
+        state["_failed_cache"] = None
+        state["_revocation_store"] = None
+        state["_sync_thread"] = None
+        state["metrics"] = None
+        del state["_sync_stop"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._sync_stop = threading.Event()
+        if self.config.cache_size:
+            self._verified_cache = TTLCache(
+                self.config.cache_size, self.config.cache_ttl)
+        if self.config.negative_cache_size:
+            self._failed_cache = FailureCache(
+                self.config.negative_cache_size, self.config.negative_cache_ttl)
+
+    def _worker_payload(self, verify_only: bool) -> Tuple[bytes, bytes]:
+        """Pickle the plugin for process pool workers, with its digest
+
+        With verify_only the private keys are left out, so verifying
+        workers never parse or hold them.
+        """
+        self._sync_config_keys()
+        state = self.__getstate__()
+        if verify_only:
+            config = dataclasses.replace(self.config, private_key=None)
+            state["config"] = config
+            state["keyset"] = self.keyset.verification_copy()
+            state["_key_source"] = self._config_key_source(config)
+        data = pickle.dumps(state, pickle.HIGHEST_PROTOCOL)
+        return hashlib.blake2b(data, digest_size=16).digest(), data
+
+    def close(self) -> None:
+        """Stop the background revocation sync, if running
+
+        Example:
+            >>> auth = JWTAuthPlugin(config, revocation_store=store)
+            >>> auth.close()
+        """
+        self._sync_stop.set()
+        if self._sync_thread is not None:
+            self._sync_thread.join()
+            self._sync_thread = None
+
     @staticmethod
-    def generate_rsa_keys() -> Tuple[bytes, bytes]:
+    def generate_rsa_keys(key_size: int = 2048) -> Tuple[bytes, bytes]:
         """Generate RSA private and public keys
 
+        Args:
+            key_size (int): Size of the RSA key in bits
+
         Returns: `tuple` [bytes, bytes]: Private and public keys
 
         Example:
             >>> private_key, public_key = JWTAuthPlugin.generate_rsa_keys()    
             """
-        return generate_rsa_keys()
+        return generate_rsa_keys(key_size)
 
+    @instrument("generate_tokens", TOKENS_ISSUED, 2)
     def generate_tokens(self, user_data: Dict[str, Any]) -> Tuple[str, str]:
         """Generate access and refresh tokens
 
@@ -49,92 +226,424 @@ class JWTAuthPlugin:
         >>> auth = JWTAuthPlugin(config)
         >>> access_token, refresh_token = auth.generate_tokens({"user_id": 123})
     """
+        return self._generate_pair(user_data, int(time.time()))
+
+    def generate_tokens_bulk(
+        self,
+        users: Iterable[Dict[str, Any]],
+        executor: Optional[Executor] = None,
+        chunksize: Optional[int] = None
+    ) -> Iterator[Tuple[str, str]]:
+        """Generate access and refresh tokens for many users
+
+        All pairs in the batch share one issue timestamp and one signing key,
+        resolved before the first token is signed. Pairs are yielded as they
+        are produced.
+
+        Args:
+            users (Iterable[Dict[str, Any]]): User data to encode, one per pair
+            executor (Optional[Executor]): Thread or process pool to sign on.
+                The pool consumes ``users`` up front; results still stream back
+                in input order. A process pool receives the plugin once per
+                task and each worker loads the keys only once.
+            chunksize (Optional[int]): Users sent to a process pool worker per
+                task; by default about four tasks per worker
+
+        Yields:
+            Tuple[str, str]: Access token and refresh token for each user
+
+        Raises:
+            JWTError: If token generation fails
+
+        Example:
+            >>> for access, refresh in auth.generate_tokens_bulk(accounts):
+            ...     store(access, refresh)
+        """
+        now = int(time.time())
         try:
+            entry = self._signing_entry()
+        except Exception as e:
+            raise JWTError(f"Token generation failed: {str(e)}")
+
+        if executor is None:
+            pairs = (self._generate_pair(user_data, now, entry) for user_data in users)
+        elif isinstance(executor, ProcessPoolExecutor):
+            users = list(users)
+            if chunksize is None:
+                chunksize = _default_chunksize(executor, len(users))
+            pairs = executor.map(
+                _generate_in_worker, repeat(self._worker_payload(verify_only=False)),
+                users, repeat(now), chunksize=chunksize)
+        else:
+            pairs = executor.map(self._generate_pair, users, repeat(now), repeat(entry))
+        for pair in pairs:
+            if self.metrics is not None:
+                self.metrics.increment(TOKENS_ISSUED, None, 2)
+            yield pair
+
+    def _generate_pair(
+        self,
+        user_data: Dict[str, Any],
+        now: int,
+        entry: Optional[KeyEntry] = None
+    ) -> Tuple[str, str]:
+        """Create an access/refresh pair issued at ``now``, signed with ``entry``"""
+        try:
+            if entry is None:
+                entry = self._signing_entry()
+
             access_token = self._create_token(
                 payload={**user_data, "type": "access"},
-                expiry=self.config.access_token_expiry
+                expiry=self.config.access_token_expiry,
+                now=now,
+                entry=entry
             )
 
             refresh_token = self._create_token(
                 payload={**user_data, "type": "refresh"},
-                expiry=self.config.refresh_token_expiry
+                expiry=self.config.refresh_token_expiry,
+                now=now,
+                entry=entry
             )
 
             return access_token, refresh_token
         except Exception as e:
             raise JWTError(f"Token generation failed: {str(e)}")
 
-    def _create_token(self, payload: Dict[str, Any], expiry: int) -> str:
-        """Create a JWT token with specified payload and expiry"""
+    @staticmethod
+    def _config_key_source(config: TokenConfig) -> Tuple[Any, ...]:
+        return (config.algorithm, config.secret_key, config.private_key,
+                config.public_key, config.min_key_size, config.key_id)
+
+    def _sync_config_keys(self) -> None:
+        """Register the config's keys in the key set as the active key
+
+        Keys are parsed once and registered again only when the algorithm,
+        key material or key_id on the config changes. Keys previously
+        registered under another kid stay in the set and keep verifying.
+        """
+        config = self.config
+        source = self._config_key_source(config)
+        if source != self._key_source:
+            self.keyset.min_key_size = config.min_key_size
+            self.keyset.add(
+                config.key_id,
+                private_key=config.private_key,
+                public_key=config.public_key,
+                secret_key=config.secret_key,
+                algorithm=config.algorithm,
+                activate=True
+            )
+            self._key_source = source
+
+    def _signing_entry(self) -> KeyEntry:
+        """Return the key set entry used to sign new tokens"""
+        self._sync_config_keys()
+        return self.keyset.active()
+
+    def _create_token(
+        self,
+        payload: Dict[str, Any],
+        expiry: int,
+        now: Optional[int] = None,
+        entry: Optional[KeyEntry] = None
+    ) -> str:
+        """Create a JWT token with specified payload and expiry
+
+        ``now`` is the issue time as an integer UNIX timestamp and ``entry``
+        the signing key; the active key is used when it is omitted.
+        """
         try:
+            if now is None:
+                now = int(time.time())
+
             token_payload = {
                 **payload,
-                "exp": datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=expiry),
-                "iat": datetime.datetime.now(datetime.timezone.utc)
+                "exp": now + expiry,
+                "iat": now
             }
+            if self.config.use_jti:
+                token_payload["jti"] = base64.urlsafe_b64encode(
+                    secrets.token_bytes(16)).rstrip(b"=").decode("ascii")
 
-            if self.config.algorithm.startswith("RS"):
-                return jwt.encode(token_payload, self.config.private_key, algorithm=self.config.algorithm)
-            return jwt.encode(token_payload, self.config.secret_key, algorithm=self.config.algorithm)
+            return self._encoder.encode(token_payload, entry or self._signing_entry())
         except Exception as e:
             raise JWTError(f"Token creation failed: {str(e)}")
 
-    def verify_token(self, token: str, token_type: str = "access") -> Dict[str, Any]:
+    @instrument("verify_token", TOKENS_VERIFIED)
+    def verify_token(self, token: str, token_type: Optional[str] = "access") -> Dict[str, Any]:
         """Verify and decode a JWT token
 
+        Tokens naming a ``kid`` that is not in the key set are verified with
+        the plugin's `JWKSClient`, if any, as are tokens without a ``kid``
+        whose ``alg`` differs from the local key's. Such third-party tokens
+        usually carry no ``type`` claim; verify them with
+        ``token_type=None``, which requires only ``exp``. Their ``iss`` is
+        checked against ``config.issuer`` when set; a token carrying ``aud``
+        is rejected unless it names ``config.audience``.
+
         Args:
             token (str): Token to verify
-            token_type (str): Expected token type ("access" or "refresh")
+            token_type (Optional[str]): Expected token type ("access" or
+                "refresh"), or None to skip the type check
 
         Returns:
             Dict[str, Any]: Decoded token payload
 
         Raises:
-            JWTError: If token verification fails
+            JWTError: If token verification fails. With a negative cache
+            configured, a token that failed recently raises the same error
+            again without being decoded.
         """
-        if token in self._blacklisted_tokens:
-            raise JWTError("Token has been blacklisted")
+        failure_key = self._check_failures(token, token_type)
+        try:
+            cached = self._verify_cached(token, token_type)
+            if cached is not None:
+                return cached
+            return self._verify_signature(token, token_type, self._prevalidate(token, token_type))
+        except JWTError as e:
+            self._record_failure(failure_key, e)
+            raise
+
+    def _check_failures(
+        self,
+        token: str,
+        token_type: Optional[str]
+    ) -> Optional[Tuple[bytes, Optional[str]]]:
+        """Raise the error a token recently failed with, if remembered
 
-        if not token:
-            # Changed from JWTInvalidTokenError
-            raise JWTError("Invalid token format")
+        Returns:
+            Optional[Tuple[bytes, str]]: Negative cache key for the token, or
+            None if the negative cache is disabled or the token is not cacheable
+        """
+        if self._failed_cache is None or not isinstance(token, str):
+            return None
+        max_size = self.config.max_token_size
+        if max_size and len(token) > max_size:
+            return None
+
+        key = (token_digest(token), token_type)
+        # A key change on the config must bump the version before the lookup
+        self._sync_config_keys()
+        error = self._failed_cache.lookup(key, self._keys_version())
+        if error is not None:
+            if self.metrics is not None:
+                self.metrics.increment(CACHE_HITS, {"cache": "negative"})
+            # A fresh copy, so tracebacks do not pile up on the cached error
+            raise copy.copy(error)
+        return key
+
+    def _record_failure(self, key: Optional[Tuple[bytes, Optional[str]]], error: JWTError) -> None:
+        """Remember a deterministic verification failure"""
+        if key is not None and error.message in _CACHEABLE_FAILURES:
+            self._failed_cache.record(key, error, self._keys_version())
+
+    def _keys_version(self) -> Tuple[int, int]:
+        """Versions of the local key set and the JWKS, for the negative cache"""
+        return self.keyset.version, self.jwks.version if self.jwks is not None else 0
+
+    def _external_key(self, entry: KeyEntry) -> bool:
+        """Return True if entry came from the JWKS rather than the key set"""
+        return self.jwks is not None and self.keyset.get(entry.kid) is not entry
+
+    def _prevalidate(self, token: str, token_type: Optional[str], refetch: bool = True) -> KeyEntry:
+        """Reject tokens that would fail strict validation, before any crypto
+
+        Decodes the header and payload once and checks the algorithm, the
+        required claims, expiry and type. Tokens passing this stage still get
+        full validation in `_verify_signature`. ``refetch`` allows a JWKS
+        fetch for an unknown ``kid``; pass False where blocking on HTTP is
+        not acceptable.
 
-        # Validate token structure
-        if not isinstance(token, str) or token.count('.') != 2:
-            raise JWTError("Invalid token format")
+        Returns:
+            KeyEntry: Key named by the token's ``kid`` header
 
-        try:
-            key = self.config.public_key if self.config.algorithm.startswith(
-                "RS") else self.config.secret_key
+        Raises:
+            JWTError: If the token is malformed, names an unknown key or fails
+            a claim check
+        """
+        header, payload = decode_unverified(token)
+        kid = header.get("kid")
+        if kid is not None and not isinstance(kid, str):
+            raise JWTInvalidTokenError("Invalid token format")
+
+        self._sync_config_keys()
+        entry = self.keyset.get(kid)
+        if self.jwks is not None and (
+                entry is None or (kid is None and entry.algorithm != header.get("alg"))):
+            # A token without a kid whose alg does not match the local key
+            # may come from a provider publishing a single key
+            entry = self.jwks.get(kid, refetch) or entry
+        if entry is None:
+            raise JWTInvalidTokenError("Unknown key id")
+
+        prevalidate(header, payload, entry.algorithm, token_type, time.time())
+        return entry
+
+    def _verify_signature(
+        self,
+        token: str,
+        token_type: Optional[str],
+        entry: Optional[KeyEntry] = None
+    ) -> Dict[str, Any]:
+        """Decode a token with full signature and claim validation
+
+        Callers must run `_verify_cached` first. ``entry`` is the key returned
+        by `_prevalidate`; it is looked up again when omitted.
+        """
+        if entry is None:
+            entry = self._prevalidate(token, token_type)
+        cache_key = token_digest(token) if self._verified_cache is not None else None
+
+        options = {
+            'verify_signature': True,
+            'verify_exp': True,
+            'verify_iat': True,
+            'require': ['exp', 'iat', 'type'] if token_type is not None else ['exp']
+        }
+        claims: Dict[str, Any] = {}
+        if self._external_key(entry):
+            # Third-party tokens: a token carrying aud is rejected unless it
+            # names the configured audience
+            claims = {"issuer": self.config.issuer, "audience": self.config.audience}
 
+        try:
             # Decode token with strict validation
             payload = jwt.decode(
                 token,
-                key,
-                algorithms=[self.config.algorithm],
-                options={
-                    'verify_signature': True,
-                    'verify_exp': True,
-                    'verify_iat': True,
-                    'require': ['exp', 'iat', 'type']
-                }
+                entry.verification_key,
+                algorithms=[entry.algorithm],
+                options=options,
+                **claims
             )
 
+            self._check_jti(payload)
+
+            if cache_key is not None:
+                self._verified_cache.set(
+                    cache_key, (dict(payload), entry), expires_at=payload["exp"])
+
             # Validate token type
-            if payload.get("type") != token_type:
-                raise JWTError("Invalid token type")
+            if token_type is not None and payload.get("type") != token_type:
+                raise JWTInvalidTokenError("Invalid token type")
 
             return payload
 
+        except JWTError:
+            raise
         except jwt.ExpiredSignatureError:
-            raise JWTError("Token has expired")
+            raise JWTTokenExpiredError()
         except jwt.InvalidSignatureError:
-            raise JWTError("Invalid token signature")
+            raise JWTSignatureError()
         except jwt.InvalidTokenError:
-            raise JWTError("Invalid token format")
+            raise JWTInvalidTokenError("Invalid token format")
         except Exception as e:
             raise JWTError(f"Token verification failed: {str(e)}")
 
+    def _verify_cached(self, token: str, token_type: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Run the checks that need no cryptography
+
+        Rejects blacklisted and malformed tokens and returns the payload on a
+        verified-token cache hit.
+
+        Returns:
+            Optional[Dict[str, Any]]: Cached payload, or None if the token
+            still needs full verification
+
+        Raises:
+            JWTError: If the token is too large, blacklisted, malformed or of
+            the wrong type
+        """
+        max_size = self.config.max_token_size
+        if max_size and isinstance(token, str) and len(token) > max_size:
+            raise JWTInvalidTokenError("Token exceeds maximum size")
+
+        if token in self._blacklisted_tokens:
+            raise JWTBlacklistedError()
+
+        if not token:
+            raise JWTInvalidTokenError("Invalid token format")
+
+        # Validate token structure
+        if not isinstance(token, str) or token.count('.') != 2:
+            raise JWTInvalidTokenError("Invalid token format")
+
+        if self._verified_cache is None:
+            return None
+
+        cached = self._verified_cache.get(token_digest(token))
+        if cached is None:
+            return None
+
+        payload, entry = cached
+        # The payload only stands while the key that verified it is still
+        # registered under its kid; a retired or replaced key needs a full check
+        self._sync_config_keys()
+        kid = entry.kid
+        if self.keyset.get(kid) is not entry and (
+                self.jwks is None or self.jwks.get(kid, refetch=False) is not entry):
+            return None
+
+        self._check_jti(payload)
+        if token_type is not None and payload.get("type") != token_type:
+            raise JWTInvalidTokenError("Invalid token type")
+        if self.metrics is not None:
+            self.metrics.increment(CACHE_HITS, {"cache": "verified"})
+        return dict(payload)
+
+    def verify_tokens(
+        self,
+        tokens: Iterable[str],
+        token_type: Optional[str] = "access",
+        executor: Optional[Executor] = None,
+        chunksize: Optional[int] = None
+    ) -> List[Union[Dict[str, Any], JWTError]]:
+        """Verify many tokens, optionally in parallel
+
+        Each token is verified exactly as by `verify_token`. Failures are
+        returned in place rather than raised, so one bad token does not abort
+        the batch.
+
+        Args:
+            tokens (Iterable[str]): Tokens to verify
+            token_type (Optional[str]): Expected token type ("access" or
+                "refresh"), or None to skip the type check
+            executor (Optional[Executor]): Thread or process pool to run the
+                verifications on. RSA verification releases the GIL, so a
+                ThreadPoolExecutor scales across cores for RS* algorithms. A
+                process pool receives the plugin without its private keys
+                once per task and each worker loads the keys only once.
+            chunksize (Optional[int]): Tokens sent to a process pool worker
+                per task; by default about four tasks per worker
+
+        Returns:
+            List[Union[Dict[str, Any], JWTError]]: Decoded payload or error
+            for each token, in input order
+
+        Example:
+            >>> with ThreadPoolExecutor() as pool:
+            ...     results = auth.verify_tokens(tokens, executor=pool)
+        """
+        if executor is None:
+            return [self._verify_or_error(token, token_type) for token in tokens]
+        if not isinstance(executor, ProcessPoolExecutor):
+            return list(executor.map(self._verify_or_error, tokens, repeat(token_type)))
+
+        tokens = list(tokens)
+        if chunksize is None:
+            chunksize = _default_chunksize(executor, len(tokens))
+        return list(executor.map(
+            _verify_in_worker, repeat(self._worker_payload(verify_only=True)),
+            tokens, repeat(token_type), chunksize=chunksize))
+
+    def _verify_or_error(self, token: str, token_type: Optional[str]) -> Union[Dict[str, Any], JWTError]:
+        """Verify a token, returning the error instead of raising it"""
+        try:
+            return self.verify_token(token, token_type)
+        except JWTError as e:
+            return e
+
+    @instrument("refresh_access_token", TOKENS_ISSUED)
     def refresh_access_token(self, refresh_token: str) -> str:
         """ Refresh access token using refresh token
 
@@ -155,15 +664,27 @@ class JWTAuthPlugin:
             payload = self.verify_token(refresh_token, token_type="refresh")
             payload.pop("exp", None)
             payload.pop("iat", None)
+            payload.pop("jti", None)
             payload["type"] = "access"
 
             return self._create_token(payload, self.config.access_token_expiry)
+        except JWTError as e:
+            # Keep the error code of the underlying failure, e.g. TOKEN_EXPIRED
+            raise JWTError(f"Token refresh failed: {e.message}", e.error_code)
         except Exception as e:
             raise JWTError(f"Token refresh failed: {str(e)}")
 
+    @instrument("blacklist_token", TOKENS_BLACKLISTED)
     def blacklist_token(self, token: str) -> None:
         """Add token to blacklist
 
+        Tokens carrying a ``jti`` claim are revoked by jti, which the
+        blacklist stores as 16 raw bytes; other tokens are stored whole. The
+        token's expiry is recorded so that `clean_blacklist` can drop it
+        without decoding it again. Once the blacklist holds
+        ``config.max_blacklist_size`` entries, the entries that expire
+        soonest are evicted. Safe to call from many threads.
+
         Args:
             token (str): Token to blacklist
 
@@ -173,33 +694,159 @@ class JWTAuthPlugin:
 
         """
 
-        self._blacklisted_tokens.add(token)
+        key, exp = self._revocation_entry(token)
+        self._blacklisted_tokens.add(key, exp)
+        if self._verified_cache is not None:
+            self._verified_cache.pop(token_digest(token))
+
+        if self._revocation_store is not None:
+            try:
+                self._revocation_store.add(key, exp)
+            except Exception as e:
+                raise JWTError(f"Failed to record revocation: {str(e)}")
+
+    def blacklist_filter_snapshot(self) -> Optional[bytes]:
+        """Build a Bloom filter of the blacklist for sharing with workers
+
+        Load the snapshot with `BloomFilter.from_bytes`. A key the snapshot
+        does not contain is certainly not blacklisted. Building it walks
+        every entry; lookups in this process never use the filter.
+
+        Returns:
+            Optional[bytes]: Serialized filter, or None if
+            ``config.blacklist_filter_error_rate`` is not set
+
+        Example:
+            >>> bloom = BloomFilter.from_bytes(auth.blacklist_filter_snapshot())
+        """
+        return self._blacklisted_tokens.filter_snapshot()
+
+    def sync_revocations(self) -> int:
+        """Pull revocations recorded by other processes into the local blacklist
+
+        Runs automatically every ``config.revocation_sync_interval`` seconds
+        when the plugin has a revocation store.
+
+        Returns:
+            int: Number of entries added to the local blacklist
+
+        Raises:
+            JWTError: If no revocation store is configured
+
+        Example:
+            >>> auth = JWTAuthPlugin(config, revocation_store=store)
+            >>> auth.sync_revocations()
+        """
+        if self._revocation_store is None:
+            raise JWTError("No revocation store configured")
+
+        entries, self._revocation_cursor = self._revocation_store.changes_since(
+            self._revocation_cursor)
+        added = 0
+        for key, exp in entries:
+            if key not in self._blacklisted_tokens:
+                self._blacklisted_tokens.add(key, exp)
+                added += 1
+        return added
+
+    def _sync_loop(self) -> None:
+        while not self._sync_stop.wait(self.config.revocation_sync_interval):
+            try:
+                self.sync_revocations()
+            except Exception as e:
+                logger.error(f"Revocation sync failed: {str(e)}")
+
+    def cache_info(self) -> Optional[Dict[str, int]]:
+        """Return verified-token cache statistics
+
+        Returns:
+            Optional[Dict[str, int]]: Hits, misses, size and maxsize, or None
+            if the cache is disabled
+
+        Example:
+            >>> auth = JWTAuthPlugin(TokenConfig(secret_key="key", cache_size=1024))
+            >>> auth.cache_info()
+            {'hits': 0, 'misses': 0, 'size': 0, 'maxsize': 1024}
+        """
+        if self._verified_cache is None:
+            return None
+        return self._verified_cache.stats()
+
+    def negative_cache_info(self) -> Optional[Dict[str, Any]]:
+        """Return negative cache statistics
+
+        Returns:
+            Optional[Dict[str, Any]]: Hits, misses, size, maxsize and hits per
+            error reason, or None if the negative cache is disabled
 
+        Example:
+            >>> auth = JWTAuthPlugin(TokenConfig(secret_key="key", negative_cache_size=1024))
+            >>> auth.negative_cache_info()["reasons"]
+            {'Token has expired': 41, 'Invalid token signature': 3}
+        """
+        if self._failed_cache is None:
+            return None
+        return self._failed_cache.stats()
+
+    @instrument("clean_blacklist")
     def clean_blacklist(self) -> None:
         """Remove expired tokens from blacklist
 
+        Shards are cleaned one at a time, so concurrent verification and
+        blacklisting only ever wait on the shard being cleaned.
+
         Example:
             >>> auth = JWTAuthPlugin(config)
             >>> auth.clean_blacklist()
         """
-        current_time = datetime.datetime.now(datetime.timezone.utc)
-        self._blacklisted_tokens = {
-            token for token in self._blacklisted_tokens
-            if not self._is_token_expired(token)
-        }
+        now = time.time()
+        self._blacklisted_tokens.remove_expired(now)
 
-    def _is_token_expired(self, token: str) -> bool:
-        """Check if token has expired
+        if self._revocation_store is not None:
+            try:
+                self._revocation_store.purge_expired(now)
+            except Exception as e:
+                logger.warning(f"Failed to purge expired revocations: {str(e)}")
+
+    def _check_jti(self, payload: Dict[str, Any]) -> None:
+        """Raise if the token's jti has been blacklisted"""
+        jti = payload.get("jti")
+        if jti is not None and self._jti_key(jti) in self._blacklisted_tokens:
+            raise JWTBlacklistedError()
+
+    @staticmethod
+    def _jti_key(jti: Any) -> Hashable:
+        """Return the compact blacklist key for a jti claim
+
+        jti values minted by this plugin decode to 16 raw bytes; anything
+        else is stored as-is.
+        """
+        if isinstance(jti, str) and len(jti) == 22:
+            try:
+                raw = base64.urlsafe_b64decode(jti + "==")
+            except (binascii.Error, ValueError):
+                return jti
+            if len(raw) == 16:
+                return raw
+        return jti
+
+    @classmethod
+    def _revocation_entry(cls, token: str) -> Tuple[Hashable, float]:
+        """Return the blacklist key and expiry for a token
+
+        Tokens carrying a jti are revoked by jti, everything else by the
+        full token string.
 
         Args:
-            token (str): Token to check
+            token (str): Token to inspect
 
         Returns:
-            bool: True if token has expired
+            Tuple[Hashable, float]: Blacklist key, and expiry as a UNIX
+            timestamp (0 if it cannot be read)
 
         """
         try:
-            # Decode without verification to extract exp claim
+            # Decode without verification to extract exp and jti claims
             payload = jwt.decode(
                 token,
                 options={
@@ -207,17 +854,12 @@ class JWTAuthPlugin:
                     'verify_exp': False
                 }
             )
-
-            # Check if token has expired
-            exp_timestamp = payload.get('exp')
-            if not exp_timestamp:
-                return True
-
-            exp_time = datetime.datetime.fromtimestamp(
-                exp_timestamp, tz=datetime.timezone.utc)
-            current_time = datetime.datetime.now(datetime.timezone.utc)
-
-            return current_time > exp_time
-
         except Exception:
-            return True
+            return token, 0
+
+        jti = payload.get('jti')
+        key = cls._jti_key(jti) if isinstance(jti, str) else token
+        try:
+            return key, float(payload.get('exp') or 0)
+        except (TypeError, ValueError):
+            return key, 0
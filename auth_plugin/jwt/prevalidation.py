@@ -0,0 +1,78 @@
+import base64
+import binascii
+import json
+from typing import Any, Dict, Optional, Tuple
+
+from .exceptions import JWTInvalidTokenError, JWTTokenExpiredError
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def decode_unverified(token: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Decode a token's header and payload without verifying anything
+
+    Args:
+        token (str): Encoded JWT
+
+    Returns:
+        Tuple[Dict[str, Any], Dict[str, Any]]: Header and payload
+
+    Raises:
+        JWTInvalidTokenError: If the segments are not base64url encoded JSON objects
+    """
+    try:
+        header_segment, payload_segment, _ = token.split(".")
+        header = json.loads(_b64decode(header_segment))
+        payload = json.loads(_b64decode(payload_segment))
+    except (ValueError, TypeError, binascii.Error):
+        # json.JSONDecodeError and UnicodeDecodeError are ValueErrors
+        raise JWTInvalidTokenError("Invalid token format")
+
+    if not isinstance(header, dict) or not isinstance(payload, dict):
+        raise JWTInvalidTokenError("Invalid token format")
+    return header, payload
+
+
+def prevalidate(
+    header: Dict[str, Any],
+    payload: Dict[str, Any],
+    algorithm: str,
+    token_type: Optional[str],
+    now: float
+) -> None:
+    """Reject a decoded token that strict validation would certainly reject
+
+    Mirrors the claim checks `jwt.decode` runs after the signature check, so
+    that expired tokens, tokens of the wrong type and tokens signed with an
+    unexpected algorithm fail without any cryptography. Missing or malformed
+    claims are left to strict validation, which reports the signature error
+    first.
+
+    Args:
+        header (Dict[str, Any]): Decoded token header
+        payload (Dict[str, Any]): Decoded token payload
+        algorithm (str): Algorithm of the key the token names
+        token_type (Optional[str]): Expected ``type`` claim, or None to skip
+            the check
+        now (float): Current UNIX time
+
+    Raises:
+        JWTError: With the error strict validation would produce
+    """
+    if header.get("alg") != algorithm:
+        raise JWTInvalidTokenError("Invalid token format")
+
+    exp = payload.get("exp")
+    if exp is not None:
+        try:
+            expired = int(exp) <= now
+        except (ValueError, TypeError, OverflowError):
+            expired = False
+        if expired:
+            raise JWTTokenExpiredError()
+
+    claimed_type = payload.get("type")
+    if token_type is not None and claimed_type is not None and claimed_type != token_type:
+        raise JWTInvalidTokenError("Invalid token type")
@@ -0,0 +1,207 @@
+"""Shared revocation stores for JWTAuthPlugin
+
+A revocation store records blacklisted tokens in a database shared by every
+process. Each `JWTAuthPlugin` keeps a local mirror of the store and pulls
+new entries incrementally, so `verify_token` never waits on the database.
+"""
+import datetime
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Hashable, List, Optional, Tuple
+
+RevocationEntry = Tuple[Hashable, float]
+
+
+class RevocationStore(ABC):
+    """Abstract base class for shared revocation stores
+
+    Keys are the blacklist keys used by `JWTAuthPlugin`: raw jti bytes or
+    full token strings. Expiry times are UNIX timestamps.
+
+    Args:
+        clock_skew (float): Seconds of overlap applied to every incremental
+            fetch so entries written by replicas with a slightly slow clock
+            are not missed
+    """
+
+    def __init__(self, clock_skew: float = 5.0):
+        self.clock_skew = clock_skew
+
+    @abstractmethod
+    def add(self, key: Hashable, exp: float) -> None:
+        """Record a revoked key until exp"""
+        pass
+
+    @abstractmethod
+    def changes_since(self, cursor: Optional[float]) -> Tuple[List[RevocationEntry], float]:
+        """Return entries revoked since cursor and the cursor for the next call
+
+        Args:
+            cursor (Optional[float]): Value returned by the previous call, or
+                None to fetch every unexpired entry
+
+        Returns:
+            Tuple[List[RevocationEntry], float]: New entries and the next
+            cursor
+        """
+        pass
+
+    @abstractmethod
+    def purge_expired(self, now: float) -> int:
+        """Delete entries whose expiry is at or before now"""
+        pass
+
+
+class MongoRevocationStore(RevocationStore):
+    """Revocation store backed by a MongoDB collection
+
+    Expired entries are removed by a TTL index on ``exp``.
+
+    Args:
+        db_manager: Connected `MongoDBManager`
+        collection_name (str): Collection holding revoked keys
+        collection: Collection to use instead of ``db_manager.db[collection_name]``
+        clock_skew (float): See `RevocationStore`
+
+    Example:
+        >>> store = MongoRevocationStore(create_db_manager("mongodb", db_name="auth"))
+        >>> auth = JWTAuthPlugin(config, revocation_store=store)
+    """
+
+    def __init__(
+        self,
+        db_manager: Any = None,
+        collection_name: str = "revoked_tokens",
+        collection: Any = None,
+        clock_skew: float = 5.0
+    ):
+        super().__init__(clock_skew)
+        self.collection = collection if collection is not None else db_manager.db[collection_name]
+        self.collection.create_index("exp", expireAfterSeconds=0)
+        self.collection.create_index("revoked_at")
+
+    def add(self, key: Hashable, exp: float) -> None:
+        self.collection.update_one(
+            {"_id": key},
+            {"$set": {"exp": _to_datetime(exp), "revoked_at": time.time()}},
+            upsert=True
+        )
+
+    def changes_since(self, cursor: Optional[float]) -> Tuple[List[RevocationEntry], float]:
+        if cursor is None:
+            cursor = time.time()
+            query = {"exp": {"$gt": _to_datetime(cursor)}}
+        else:
+            query = {"revoked_at": {"$gte": cursor - self.clock_skew}}
+
+        entries = []
+        for document in self.collection.find(query):
+            entries.append((document["_id"], _to_timestamp(document["exp"])))
+            cursor = max(cursor, document["revoked_at"])
+        return entries, cursor
+
+    def purge_expired(self, now: float) -> int:
+        return self.collection.delete_many({"exp": {"$lte": _to_datetime(now)}}).deleted_count
+
+
+class SQLRevocationStore(RevocationStore):
+    """Revocation store backed by a SQL table through SQLAlchemy
+
+    Intended for `PostgresDBManager`, but works with any SQLAlchemy engine.
+    The table is created if it does not exist.
+
+    Args:
+        db_manager: Connected `PostgresDBManager`
+        engine: SQLAlchemy engine to use instead of ``db_manager.client``
+        table_name (str): Table holding revoked keys
+        clock_skew (float): See `RevocationStore`
+
+    Example:
+        >>> store = SQLRevocationStore(create_db_manager("postgresql", ...))
+        >>> auth = JWTAuthPlugin(config, revocation_store=store)
+    """
+
+    def __init__(
+        self,
+        db_manager: Any = None,
+        engine: Any = None,
+        table_name: str = "revoked_tokens",
+        clock_skew: float = 5.0
+    ):
+        # Imported here so that importing this module does not load SQLAlchemy
+        from sqlalchemy import Column, Float, LargeBinary, MetaData, Table
+        from sqlalchemy.exc import IntegrityError
+
+        super().__init__(clock_skew)
+        self._integrity_error = IntegrityError
+        self.engine = engine if engine is not None else db_manager.client
+        metadata = MetaData()
+        self.table = Table(
+            table_name,
+            metadata,
+            Column("token_key", LargeBinary, primary_key=True),
+            Column("exp", Float, nullable=False, index=True),
+            Column("revoked_at", Float, nullable=False, index=True)
+        )
+        metadata.create_all(self.engine)
+
+    def add(self, key: Hashable, exp: float) -> None:
+        table = self.table
+        encoded = _encode_key(key)
+        values = {"exp": exp, "revoked_at": time.time()}
+        try:
+            with self.engine.begin() as conn:
+                result = conn.execute(
+                    table.update().where(table.c.token_key == encoded).values(**values))
+                if result.rowcount == 0:
+                    conn.execute(table.insert().values(token_key=encoded, **values))
+        except self._integrity_error:
+            # Another replica inserted the same key concurrently
+            pass
+
+    def changes_since(self, cursor: Optional[float]) -> Tuple[List[RevocationEntry], float]:
+        from sqlalchemy import select
+
+        table = self.table
+        query = select(table.c.token_key, table.c.exp, table.c.revoked_at)
+        if cursor is None:
+            cursor = time.time()
+            query = query.where(table.c.exp > cursor)
+        else:
+            query = query.where(table.c.revoked_at >= cursor - self.clock_skew)
+
+        entries = []
+        with self.engine.connect() as conn:
+            for token_key, exp, revoked_at in conn.execute(query):
+                entries.append((_decode_key(token_key), exp))
+                cursor = max(cursor, revoked_at)
+        return entries, cursor
+
+    def purge_expired(self, now: float) -> int:
+        with self.engine.begin() as conn:
+            return conn.execute(self.table.delete().where(self.table.c.exp <= now)).rowcount
+
+
+def _encode_key(key: Hashable) -> bytes:
+    """Tag a blacklist key so jti bytes and token strings share one column"""
+    if isinstance(key, bytes):
+        return b"j" + key
+    return b"t" + str(key).encode("utf-8")
+
+
+def _decode_key(value: bytes) -> Hashable:
+    value = bytes(value)
+    if value[:1] == b"j":
+        return value[1:]
+    return value[1:].decode("utf-8")
+
+
+def _to_datetime(timestamp: float) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(timestamp, tz=datetime.timezone.utc)
+
+
+def _to_timestamp(value: datetime.datetime) -> float:
+    # pymongo returns naive UTC datetimes unless tz_aware is set
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.timestamp()
@@ -1,37 +1,182 @@
 from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
 from cryptography.hazmat.backends import default_backend
-from typing import Tuple
-from .exceptions import JWTError
+from typing import Any, Optional, Tuple
+from .exceptions import JWTConfigurationError, JWTError
 
+# Curve required by each ECDSA algorithm (RFC 7518 section 3.4)
+EC_CURVES = {
+    "ES256": ec.SECP256R1,
+    "ES384": ec.SECP384R1,
+}
 
-def generate_rsa_keys(key_size: int = 2048) -> Tuple[bytes, bytes]:
+
+def is_asymmetric(algorithm: str) -> bool:
+    """Return True if algorithm signs with a private/public key pair"""
+    return algorithm.startswith(("RS", "ES")) or algorithm == "EdDSA"
+
+
+def _to_pem(private_key: Any) -> Tuple[bytes, bytes]:
+    pem_private = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+
+    pem_public = private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+
+    return pem_private, pem_public
+
+
+def generate_rsa_keys(key_size: int = 2048, min_key_size: int = 2048) -> Tuple[bytes, bytes]:
     """Generate RSA public/private key pair
 
     Args:
         key_size: Size of the RSA key in bits
+        min_key_size: Smallest key size allowed, usually `TokenConfig.min_key_size`
 
     Returns:
         Tuple containing private and public keys in PEM format
+
+    Raises:
+        JWTConfigurationError: If key_size is below min_key_size
     """
+    if key_size < min_key_size:
+        raise JWTConfigurationError(
+            f"RSA key size {key_size} is below the minimum of {min_key_size} bits")
+
     try:
         private_key = rsa.generate_private_key(
             public_exponent=65537,
             key_size=key_size,
             backend=default_backend()
         )
+        return _to_pem(private_key)
+    except Exception as e:
+        raise JWTError(f"RSA key generation failed: {str(e)}")
 
-        pem_private = private_key.private_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PrivateFormat.PKCS8,
-            encryption_algorithm=serialization.NoEncryption()
-        )
 
-        pem_public = private_key.public_key().public_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo
-        )
+def generate_ec_keys(algorithm: str = "ES256") -> Tuple[bytes, bytes]:
+    """Generate an ECDSA public/private key pair
 
-        return pem_private, pem_public
+    Args:
+        algorithm: "ES256" (P-256) or "ES384" (P-384)
+
+    Returns:
+        Tuple containing private and public keys in PEM format
+    """
+    if algorithm not in EC_CURVES:
+        raise JWTConfigurationError(f"Unsupported ECDSA algorithm: {algorithm}")
+
+    try:
+        private_key = ec.generate_private_key(EC_CURVES[algorithm](), backend=default_backend())
+        return _to_pem(private_key)
     except Exception as e:
-        raise JWTError(f"RSA key generation failed: {str(e)}")
+        raise JWTError(f"EC key generation failed: {str(e)}")
+
+
+def generate_ed25519_keys() -> Tuple[bytes, bytes]:
+    """Generate an Ed25519 public/private key pair for EdDSA
+
+    Returns:
+        Tuple containing private and public keys in PEM format
+    """
+    try:
+        return _to_pem(ed25519.Ed25519PrivateKey.generate())
+    except Exception as e:
+        raise JWTError(f"Ed25519 key generation failed: {str(e)}")
+
+
+def generate_keys(algorithm: str, key_size: int = 2048, min_key_size: int = 2048) -> Tuple[bytes, bytes]:
+    """Generate a key pair for any supported asymmetric algorithm
+
+    Args:
+        algorithm: JWT algorithm name
+        key_size: Size of RSA keys in bits; ignored for other algorithms
+        min_key_size: Smallest RSA key size allowed
+
+    Returns:
+        Tuple containing private and public keys in PEM format
+    """
+    if algorithm.startswith("RS"):
+        return generate_rsa_keys(key_size, min_key_size)
+    if algorithm.startswith("ES"):
+        return generate_ec_keys(algorithm)
+    if algorithm == "EdDSA":
+        return generate_ed25519_keys()
+    raise JWTConfigurationError(f"No key pair needed for {algorithm}")
+
+
+def _check_key_type(algorithm: str, key: Any, min_key_size: int) -> None:
+    if algorithm.startswith("RS"):
+        if not isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+            raise JWTConfigurationError(f"{algorithm} requires an RSA key")
+        if key.key_size < min_key_size:
+            raise JWTConfigurationError(
+                f"RSA key size {key.key_size} is below the minimum of {min_key_size} bits")
+    elif algorithm.startswith("ES"):
+        if (not isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey))
+                or not isinstance(key.curve, EC_CURVES[algorithm])):
+            raise JWTConfigurationError(
+                f"{algorithm} requires an EC key on curve {EC_CURVES[algorithm].name}")
+    elif not isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        raise JWTConfigurationError(f"{algorithm} requires an Ed25519 key")
+
+
+def load_keys(
+    algorithm: str,
+    secret_key: str,
+    private_key: Optional[bytes] = None,
+    public_key: Optional[bytes] = None,
+    min_key_size: int = 0
+) -> Tuple[Any, Any]:
+    """Load signing and verification keys for an algorithm
+
+    PEM keys are parsed into `cryptography` key objects so that PyJWT does
+    not parse them again on every encode and decode.
+
+    Args:
+        algorithm: JWT algorithm name
+        secret_key: Shared secret for HS* algorithms
+        private_key: PEM encoded private key for asymmetric algorithms
+        public_key: PEM encoded public key for asymmetric algorithms
+        min_key_size: Smallest RSA key size accepted, in bits
+
+    Returns:
+        Tuple containing the signing key and the verification key. For
+        asymmetric algorithms the signing key is None when no private key is
+        given, and the verification key is derived from the private key when
+        no public key is given.
+
+    Raises:
+        JWTConfigurationError: If a PEM key cannot be parsed, does not match
+        the algorithm or is too small
+    """
+    if not is_asymmetric(algorithm):
+        if not secret_key:
+            raise JWTConfigurationError(f"secret_key is required for {algorithm}")
+        return secret_key, secret_key
+
+    try:
+        signing_key = None
+        if private_key:
+            signing_key = serialization.load_pem_private_key(
+                private_key, password=None, backend=default_backend())
+        if public_key:
+            verification_key = serialization.load_pem_public_key(
+                public_key, backend=default_backend())
+        elif signing_key is not None:
+            verification_key = signing_key.public_key()
+        else:
+            raise ValueError("no key given")
+    except Exception as e:
+        raise JWTConfigurationError(f"Failed to load {algorithm} keys: {str(e)}")
+
+    for key in (signing_key, verification_key):
+        if key is not None:
+            _check_key_type(algorithm, key, min_key_size)
+
+    return signing_key, verification_key
@@ -1,16 +1,184 @@
+import random
+import threading
+import time
 import requests
 import logging
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
+from urllib3.util.retry import Retry
 from .base_auth import BaseAuth
+from .jwt.cache import TTLCache, token_digest
+
+
+class _JitteredRetry(Retry):
+    """Retry policy using full jitter: sleep a random time up to the backoff"""
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return random.uniform(0, backoff) if backoff > 0 else 0
+
+
+class _CachedToken:
+    """Access token cached for one scope"""
+
+    __slots__ = ("access_token", "refresh_token", "expires_at", "refresh_at")
+
+    def __init__(self, access_token, refresh_token, expires_at, refresh_at):
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        self.expires_at = expires_at
+        self.refresh_at = refresh_at
+
+
+class _Flight:
+    """Token request in progress, shared by every caller waiting on it"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def _scope_key(scope):
+    """Normalize a scope string or list so that equal scope sets share a cache entry"""
+    if not scope:
+        return ""
+    scopes = scope.split() if isinstance(scope, str) else scope
+    return " ".join(sorted(set(scopes)))
 
 
 class OAuth2Auth(BaseAuth):
-    def __init__(self, client_id, client_secret, redirect_uri, auth_url, token_url):
+    """OAuth2 client for the authorization code, client credentials and
+    refresh token grants
+
+    Requests go through one pooled keep-alive session, so repeated calls
+    reuse TCP and TLS connections. Every request has connect and read
+    timeouts. Connection failures are retried for every call; responses
+    with status 429, 502, 503 or 504 are retried only for idempotent
+    methods, never for the single-use code exchange. Retries wait a jittered
+    exponential backoff and honour ``Retry-After``.
+
+    Client credentials tokens are cached per scope. Once a token has used
+    ``token_refresh_ratio`` of its lifetime it is still returned, and a
+    background thread replaces it, using the refresh token when the
+    provider issued one. Concurrent callers needing the same token share a
+    single request to the token endpoint.
+
+    With an ``introspection_url``, `authenticate` validates opaque tokens
+    through RFC 7662 token introspection. Results are cached by token
+    digest: active tokens for at most ``introspection_cache_ttl`` seconds
+    and never past their ``exp``, inactive ones for
+    ``introspection_negative_ttl`` seconds. Concurrent lookups of the same
+    token share one introspection request.
+
+    Args:
+        client_id (str): Client identifier
+        client_secret (str): Client secret
+        redirect_uri (str): Redirect URI registered with the provider
+        auth_url (str): Authorization endpoint
+        token_url (str): Token endpoint
+        pool_size (int): Maximum number of kept-alive connections per host
+        connect_timeout (float): Seconds to wait for a connection
+        read_timeout (float): Seconds to wait for response data
+        max_retries (int): Retries per request; 0 disables retrying
+        backoff_factor (float): Base of the exponential backoff, in seconds
+        session (Optional[requests.Session]): Session to use instead of a
+            private one. It is used as is and not closed by `close`.
+        token_refresh_ratio (float): Fraction of a cached token's lifetime
+            after which it is refreshed in the background
+        expiry_leeway (float): Seconds before ``expires_in`` runs out at
+            which a cached token is no longer handed out
+        introspection_url (Optional[str]): Token introspection endpoint
+        introspection_cache_size (int): Maximum number of cached
+            introspection results; 0 disables the cache
+        introspection_cache_ttl (float): Upper bound in seconds on how long
+            an active token's result is cached
+        introspection_negative_ttl (float): Seconds an inactive token's
+            result is cached
+
+    Example:
+        >>> with OAuth2Auth(client_id, client_secret, redirect_uri, auth_url, token_url,
+        ...                 pool_size=20, read_timeout=5) as oauth:
+        ...     token = oauth.get_access_token(code)
+        ...     service_token = oauth.get_client_credentials_token(scope="orders:read")
+    """
+
+    RETRY_STATUSES = (429, 502, 503, 504)
+    # Lifetime assumed when the provider omits expires_in
+    DEFAULT_EXPIRES_IN = 300
+    # Seconds between background refresh attempts after one fails
+    REFRESH_RETRY_INTERVAL = 5.0
+
+    def __init__(self, client_id, client_secret, redirect_uri, auth_url, token_url,
+                 pool_size=10, connect_timeout=3.05, read_timeout=10.0,
+                 max_retries=2, backoff_factor=0.25, session=None,
+                 token_refresh_ratio=0.75, expiry_leeway=10.0, introspection_url=None,
+                 introspection_cache_size=1024, introspection_cache_ttl=300.0,
+                 introspection_negative_ttl=10.0):
+        if pool_size <= 0:
+            raise ValueError("pool_size must be positive")
+        if connect_timeout <= 0 or read_timeout <= 0:
+            raise ValueError("Timeouts must be positive")
+        if max_retries < 0 or backoff_factor < 0:
+            raise ValueError("max_retries and backoff_factor must not be negative")
+        if not 0 < token_refresh_ratio <= 1:
+            raise ValueError("token_refresh_ratio must be in (0, 1]")
+        if expiry_leeway < 0:
+            raise ValueError("expiry_leeway must not be negative")
+        if introspection_cache_size < 0:
+            raise ValueError("introspection_cache_size must not be negative")
+        if introspection_cache_ttl <= 0 or introspection_negative_ttl < 0:
+            raise ValueError("introspection_cache_ttl must be positive and "
+                             "introspection_negative_ttl must not be negative")
+
         self.client_id = client_id
         self.client_secret = client_secret
         self.redirect_uri = redirect_uri
         self.auth_url = auth_url
         self.token_url = token_url
+        self.timeout = (connect_timeout, read_timeout)
+        self._owns_session = session is None
+        self.session = session or self._create_session(pool_size, max_retries, backoff_factor)
+        self.token_refresh_ratio = token_refresh_ratio
+        self.expiry_leeway = expiry_leeway
+        self._tokens = {}
+        self._flights = {}
+        self._token_lock = threading.Lock()
+        self.introspection_url = introspection_url
+        self.introspection_negative_ttl = introspection_negative_ttl
+        self._introspection_cache = (
+            TTLCache(introspection_cache_size, introspection_cache_ttl)
+            if introspection_cache_size else None
+        )
+        self._introspections = {}
+
+    def _create_session(self, pool_size, max_retries, backoff_factor):
+        retry = _JitteredRetry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+            # Hand the last response back so raise_for_status reports it
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def close(self):
+        """Close the pooled connections of the private session"""
+        if self._owns_session:
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
     def get_authorization_url(self):
         try:
@@ -22,29 +190,265 @@ class OAuth2Auth(BaseAuth):
             raise RuntimeError("Failed to generate authorization URL")
 
     def get_access_token(self, code):
+        token = self._request_token({
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "code": code,
+            "redirect_uri": self.redirect_uri,
+            "grant_type": "authorization_code",
+        }).get("access_token")
+        logging.info("Access token received successfully")
+        return token
+
+    def refresh_access_token(self, refresh_token, scope=None):
+        """Exchange a refresh token for a new token response
+
+        Args:
+            refresh_token (str): Refresh token issued by the provider
+            scope (Optional[Union[str, List[str]]]): Scopes to request, at
+                most those originally granted
+
+        Returns:
+            dict: Token response with ``access_token`` and, when the
+            provider sends them, ``expires_in`` and a new ``refresh_token``
+
+        Raises:
+            RuntimeError: If the token endpoint rejects the request
+        """
+        data = {
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "refresh_token": refresh_token,
+            "grant_type": "refresh_token",
+        }
+        if scope:
+            data["scope"] = _scope_key(scope)
+        return self._request_token(data)
+
+    def get_client_credentials_token(self, scope=None):
+        """Return an access token for this client from the per-scope cache
+
+        A cached token is returned until ``expiry_leeway`` seconds before it
+        expires; past ``token_refresh_ratio`` of its lifetime a background
+        refresh is started. Without a usable token the caller fetches one,
+        and concurrent callers for the same scope wait for that request.
+
+        Args:
+            scope (Optional[Union[str, List[str]]]): Scopes to request, as a
+                space separated string or a list
+
+        Returns:
+            str: Access token
+
+        Raises:
+            RuntimeError: If no token could be obtained
+
+        Example:
+            >>> headers = {"Authorization": f"Bearer {oauth.get_client_credentials_token('orders:read')}"}
+        """
+        key = _scope_key(scope)
+        now = time.monotonic()
+        entry = self._tokens.get(key)
+        if entry is not None and now < entry.expires_at:
+            if now >= entry.refresh_at:
+                self._refresh_in_background(key, entry)
+            return entry.access_token
+        return self._single_flight(key, entry).access_token
+
+    def invalidate_token(self, scope=None):
+        """Drop the cached token for scope, e.g. after a resource server rejected it"""
+        with self._token_lock:
+            self._tokens.pop(_scope_key(scope), None)
+
+    def _single_flight(self, key, entry):
+        with self._token_lock:
+            current = self._tokens.get(key)
+            if current is not entry and current is not None and time.monotonic() < current.expires_at:
+                # Another caller's request completed meanwhile
+                return current
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if leader:
+            self._run_flight(key, entry, flight)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def _refresh_in_background(self, key, entry):
+        with self._token_lock:
+            if key in self._flights:
+                return
+            flight = self._flights[key] = _Flight()
+        threading.Thread(
+            target=self._background_refresh, args=(key, entry, flight),
+            name="oauth2-token-refresh", daemon=True).start()
+
+    def _run_flight(self, key, entry, flight):
         try:
-            response = requests.post(
-                self.token_url,
+            flight.result = self._fetch_token(key, entry)
+        except Exception as e:
+            flight.error = e
+        finally:
+            with self._token_lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _background_refresh(self, key, entry, flight):
+        self._run_flight(key, entry, flight)
+        if flight.error is not None:
+            # Keep serving the current token until it expires; try again shortly
+            entry.refresh_at = time.monotonic() + self.REFRESH_RETRY_INTERVAL
+            logging.warning(f"Background token refresh failed: {str(flight.error)}")
+
+    def _fetch_token(self, key, entry):
+        response = None
+        previous_refresh_token = None
+        if entry is not None and entry.refresh_token:
+            try:
+                response = self.refresh_access_token(entry.refresh_token, key)
+                # Providers may keep the refresh token valid and not send a new one
+                previous_refresh_token = entry.refresh_token
+            except RuntimeError:
+                logging.info("Refresh token rejected, requesting a new client credentials token")
+        if response is None:
+            data = {
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+                "grant_type": "client_credentials",
+            }
+            if key:
+                data["scope"] = key
+            response = self._request_token(data)
+
+        access_token = response.get("access_token")
+        if not access_token:
+            raise RuntimeError("Token response has no access_token")
+        lifetime = float(response.get("expires_in") or self.DEFAULT_EXPIRES_IN)
+        now = time.monotonic()
+        token = _CachedToken(
+            access_token,
+            response.get("refresh_token") or previous_refresh_token,
+            now + max(lifetime - self.expiry_leeway, 0),
+            now + lifetime * self.token_refresh_ratio,
+        )
+        with self._token_lock:
+            self._tokens[key] = token
+        return token
+
+    def _request_token(self, data):
+        """POST data to the token endpoint and return the decoded response"""
+        try:
+            response = self.session.post(self.token_url, data=data, timeout=self.timeout)
+            response.raise_for_status()
+            payload = response.json()
+            if not isinstance(payload, dict):
+                raise ValueError("Token response is not a JSON object")
+            return payload
+        except RequestException as e:
+            logging.error(f"Error getting access token: {str(e)}")
+            raise RuntimeError("Failed to obtain access token")
+        except Exception as e:
+            logging.error(f"Unexpected error: {str(e)}")
+            raise RuntimeError("An unexpected error occurred during token retrieval")
+
+    def authenticate(self, token):
+        """Validate an access token with the provider's introspection endpoint
+
+        Args:
+            token (str): Access token presented by a client
+
+        Returns:
+            Optional[dict]: The introspection response for an active token,
+            or None if the token is inactive or past its ``exp``
+
+        Raises:
+            NotImplementedError: If no introspection_url is configured
+            RuntimeError: If the introspection request fails
+
+        Example:
+            >>> claims = oauth.authenticate(token)
+            >>> if claims is None:
+            ...     return 401
+        """
+        if not self.introspection_url:
+            raise NotImplementedError(
+                "You need to implement the authenticate method to handle OAuth2-specific logic."
+            )
+
+        key = token_digest(token)
+        cache = self._introspection_cache
+        if cache is not None:
+            result = cache.get(key)
+            if result is not None:
+                # Callers may modify the claims; each gets its own copy
+                return dict(result) if result else None
+
+        with self._token_lock:
+            flight = self._introspections.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._introspections[key] = _Flight()
+        if leader:
+            try:
+                flight.result = self._introspect(key, token)
+            except Exception as e:
+                flight.error = e
+            finally:
+                with self._token_lock:
+                    self._introspections.pop(key, None)
+                flight.done.set()
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return dict(flight.result) if flight.result else None
+
+    def introspection_cache_info(self):
+        """Return hits, misses, size and maxsize of the introspection cache,
+        or None when it is disabled"""
+        cache = self._introspection_cache
+        return cache.stats() if cache is not None else None
+
+    def _introspect(self, key, token):
+        """Query the introspection endpoint and cache the result
+
+        Returns the response for an active token and an empty dict for an
+        inactive one, so that cached negatives are distinguishable from
+        cache misses.
+        """
+        try:
+            response = self.session.post(
+                self.introspection_url,
                 data={
                     "client_id": self.client_id,
                     "client_secret": self.client_secret,
-                    "code": code,
-                    "redirect_uri": self.redirect_uri,
-                    "grant_type": "authorization_code",
+                    "token": token,
+                    "token_type_hint": "access_token",
                 },
+                timeout=self.timeout,
             )
             response.raise_for_status()
-            token = response.json().get("access_token")
-            logging.info("Access token received successfully")
-            return token
+            result = response.json()
+            if not isinstance(result, dict) or not isinstance(result.get("active"), bool):
+                raise ValueError("Introspection response has no active flag")
         except RequestException as e:
-            logging.error(f"Error getting access token: {str(e)}")
-            raise RuntimeError("Failed to obtain access token")
+            logging.error(f"Error introspecting token: {str(e)}")
+            raise RuntimeError("Failed to introspect token")
         except Exception as e:
             logging.error(f"Unexpected error: {str(e)}")
-            raise RuntimeError("An unexpected error occurred during token retrieval")
+            raise RuntimeError("An unexpected error occurred during token introspection")
 
-    def authenticate(self, token):
-        raise NotImplementedError(
-            "You need to implement the authenticate method to handle OAuth2-specific logic."
-        )
+        now = time.time()
+        exp = result.get("exp")
+        if result["active"] and (not isinstance(exp, (int, float)) or exp > now):
+            expires_at = exp if isinstance(exp, (int, float)) else None
+        else:
+            result, expires_at = {}, now + self.introspection_negative_ttl
+
+        if self._introspection_cache is not None:
+            self._introspection_cache.set(key, result, expires_at)
+        return result
@@ -1,4 +1,40 @@
+from typing import Optional, Union
+
+
+def parse_bearer_token(value: Union[str, bytes, None]) -> Optional[str]:
+    """Return the token of a ``Bearer`` Authorization header value
+
+    Accepts the raw header as bytes (ASGI) or str (WSGI). The scheme is
+    matched case-insensitively and surrounding spaces or tabs are ignored.
+    The common ``"Bearer <token>"`` form is handled with a single slice.
+
+    Args:
+        value (Union[str, bytes, None]): Authorization header value
+
+    Returns:
+        Optional[str]: The token, or None if the header is missing, uses
+        another scheme or does not hold exactly one token
+    """
+    if not value:
+        return None
+    if isinstance(value, bytes):
+        prefix, blanks = b"Bearer ", b" \t"
+    else:
+        prefix, blanks = "Bearer ", " \t"
+
+    if value.startswith(prefix):
+        token = value[7:]
+    else:
+        value = value.lstrip(blanks)
+        if value[:6].lower() != prefix[:6].lower() or value[6:7] not in (blanks[:1], blanks[1:]):
+            return None
+        token = value[7:]
+
+    token = token.strip(blanks)
+    if not token or blanks[:1] in token or blanks[1:] in token:
+        return None
+    return token.decode("latin-1") if isinstance(token, bytes) else token
+
+
 def extract_token_from_header(auth_header):
-    if auth_header and auth_header.startswith("Bearer "):
-        return auth_header.split(" ")[1]
-    return None
+    return parse_bearer_token(auth_header)
@@ -0,0 +1,41 @@
+"""Compare signing and verification cost of the supported asymmetric algorithms
+
+Usage:
+    python benchmarks/bench_algorithms.py [--iterations 500]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth_plugin.jwt import JWTAuthPlugin, TokenConfig  # noqa: E402
+
+ALGORITHMS = ["HS256", "RS256", "ES256", "ES384", "EdDSA"]
+
+
+def per_call_us(func, iterations: int) -> float:
+    return min(timeit.repeat(func, number=iterations, repeat=3)) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    payload = {"user_id": "123", "username": "test_user", "role": "admin", "type": "access"}
+
+    print(f"{args.iterations} iterations, best of 3")
+    print(f"{'algorithm':<10}{'sign (us)':>11}{'verify (us)':>13}{'token bytes':>13}")
+    for algorithm in ALGORITHMS:
+        auth = JWTAuthPlugin(TokenConfig(
+            secret_key="benchmark-secret-key-of-32-bytes", algorithm=algorithm))
+        token = auth._create_token(payload, 3600)
+        sign = per_call_us(lambda: auth._create_token(payload, 3600), args.iterations)
+        verify = per_call_us(lambda: auth._verify_signature(token, "access"), args.iterations)
+        print(f"{algorithm:<10}{sign:>11.1f}{verify:>13.1f}{len(token):>13}")
+
+
+if __name__ == "__main__":
+    main()
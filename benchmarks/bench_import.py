@@ -0,0 +1,65 @@
+"""Measure import time of the package entry points in fresh interpreters
+
+Each target is imported in a new process so that nothing is cached. The
+report shows the median wall time and which heavy dependencies the import
+pulled in.
+
+Usage:
+    python benchmarks/bench_import.py [--repeat 10]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = [
+    "auth_plugin",
+    "auth_plugin.jwt",
+    "auth_plugin.db_manager",
+    "auth_plugin.jwt.JWTAuthPlugin",
+]
+HEAVY_MODULES = ["jwt", "cryptography", "sqlalchemy", "pymongo", "mysql", "requests", "asyncio"]
+
+PROBE = """
+import json, sys, time
+module, _, attribute = sys.argv[1].partition(":")
+start = time.perf_counter()
+imported = __import__(module, fromlist=["_"])
+if attribute:
+    getattr(imported, attribute)
+elapsed = time.perf_counter() - start
+heavy = [name for name in sys.argv[2:] if name in sys.modules]
+print(json.dumps({"seconds": elapsed, "loaded": heavy}))
+"""
+
+
+def probe(target: str) -> dict:
+    # "package.Attribute" means: import the package, then access the attribute
+    module, _, attribute = target.rpartition(".")
+    spec = f"{module}:{attribute}" if attribute[:1].isupper() else target
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE, spec, *HEAVY_MODULES],
+        cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"median of {args.repeat} fresh interpreters")
+    print(f"{'target':<32}{'ms':>9}  loaded")
+    for target in TARGETS:
+        runs = [probe(target) for _ in range(args.repeat)]
+        median_ms = statistics.median(run["seconds"] for run in runs) * 1000
+        print(f"{target:<32}{median_ms:>9.1f}  {', '.join(runs[0]['loaded']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
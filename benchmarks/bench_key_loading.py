@@ -0,0 +1,54 @@
+"""Compare RS* encode/decode cost with raw PEM keys and pre-parsed keys
+
+Usage:
+    python benchmarks/bench_key_loading.py [--algorithm RS256] [--iterations 500]
+"""
+import argparse
+import datetime
+import os
+import sys
+import timeit
+
+import jwt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth_plugin.jwt.utils import generate_rsa_keys, load_keys  # noqa: E402
+
+
+def per_call_us(func, iterations: int) -> float:
+    return min(timeit.repeat(func, number=iterations, repeat=3)) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--algorithm", default="RS256",
+                        choices=["RS256", "RS384", "RS512"])
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    private_pem, public_pem = generate_rsa_keys()
+    private_key, public_key = load_keys(args.algorithm, "", private_pem, public_pem)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    payload = {"user_id": "123", "type": "access",
+               "iat": now, "exp": now + datetime.timedelta(hours=1)}
+    token = jwt.encode(payload, private_pem, algorithm=args.algorithm)
+    algorithms = [args.algorithm]
+
+    rows = [
+        ("encode", lambda: jwt.encode(payload, private_pem, algorithm=args.algorithm),
+         lambda: jwt.encode(payload, private_key, algorithm=args.algorithm)),
+        ("decode", lambda: jwt.decode(token, public_pem, algorithms=algorithms),
+         lambda: jwt.decode(token, public_key, algorithms=algorithms)),
+    ]
+
+    print(f"{args.algorithm}, {args.iterations} iterations, best of 3")
+    print(f"{'operation':<10}{'PEM (us)':>12}{'parsed (us)':>14}{'saved':>9}")
+    for name, pem_call, parsed_call in rows:
+        pem = per_call_us(pem_call, args.iterations)
+        parsed = per_call_us(parsed_call, args.iterations)
+        print(f"{name:<10}{pem:>12.1f}{parsed:>14.1f}{(pem - parsed) / pem:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""Benchmark the JWT hot paths and compare the results against a baseline
+
+Every operation is measured for every algorithm and blacklist size. Each
+case reports throughput, latency percentiles and the peak memory allocated
+while the operation runs. Results are written as JSON so that CI can store
+one run as a baseline and fail later runs that regress.
+
+Usage:
+    python benchmarks/bench_suite.py --output results.json
+    python benchmarks/bench_suite.py --algorithms HS256 RS256 --sizes 100 10000
+    python benchmarks/bench_suite.py --output new.json --baseline baseline.json --max-regression 0.25
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import warnings
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import cryptography
+import jwt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth_plugin.jwt import JWTAuthPlugin, TokenConfig  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ALGORITHMS = ["HS256", "HS384", "HS512", "RS256", "RS384", "RS512", "ES256", "ES384", "EdDSA"]
+BLACKLIST_SIZES = [100, 1_000, 10_000, 100_000, 1_000_000]
+OPERATIONS = ["generate_tokens", "verify_token", "refresh_access_token",
+              "blacklist_token", "clean_blacklist"]
+SECRET_KEY = "benchmark-secret-key-of-sixty-four-bytes-for-hs512-signatures!!"
+USER_DATA = {"user_id": "123", "username": "bench_user", "role": "admin"}
+
+
+class Case(NamedTuple):
+    """Operation to time, with an untimed setup run before every call"""
+    run: Callable[[], Any]
+    setup: Optional[Callable[[], Any]] = None
+
+
+def make_plugin(algorithm: str, blacklist_size: int, iterations: int,
+                expired_fraction: float) -> JWTAuthPlugin:
+    """Build a plugin whose blacklist already holds blacklist_size entries
+
+    The first ``expired_fraction`` of the entries have already expired, so
+    that clean_blacklist has work to do.
+    """
+    config = TokenConfig(
+        secret_key=SECRET_KEY,
+        algorithm=algorithm,
+        # Leave room for blacklist_token so the benchmark never evicts; the
+        # limit applies to the whole blacklist, not to each shard
+        max_blacklist_size=blacklist_size + iterations * 2 + 10,
+    )
+    auth = JWTAuthPlugin(config)
+    now = time.time()
+    expired = int(blacklist_size * expired_fraction)
+    blacklist = auth._blacklisted_tokens
+    for i in range(blacklist_size):
+        blacklist.add(i.to_bytes(16, "big"), now - 60 if i < expired else now + 3600)
+    return auth
+
+
+def blacklist_restorer(auth: JWTAuthPlugin) -> Callable[[], None]:
+    """Return a callable that puts the blacklist back into its current state"""
+    shards = auth._blacklisted_tokens._shards
+    saved = [(dict(shard._expiry), list(shard._heap), shard._sequence) for shard in shards]
+
+    def restore() -> None:
+        for shard, (expiry, heap, sequence) in zip(shards, saved):
+            shard._expiry = dict(expiry)
+            shard._heap = list(heap)
+            shard._sequence = sequence
+
+    return restore
+
+
+def make_cases(auth: JWTAuthPlugin, iterations: int) -> Dict[str, Case]:
+    """Return a case per operation, with its inputs prepared"""
+    access_token, refresh_token = auth.generate_tokens(USER_DATA)
+    # blacklist_token needs a fresh token on every call
+    spare_tokens = iter([
+        auth.generate_tokens({**USER_DATA, "user_id": str(i)})[0]
+        for i in range(iterations * 2)
+    ])
+
+    return {
+        "generate_tokens": Case(lambda: auth.generate_tokens(USER_DATA)),
+        "verify_token": Case(lambda: auth.verify_token(access_token)),
+        "refresh_access_token": Case(lambda: auth.refresh_access_token(refresh_token)),
+        "blacklist_token": Case(lambda: auth.blacklist_token(next(spare_tokens))),
+        # Every call removes the same expired entries from the pre-filled state
+        "clean_blacklist": Case(auth.clean_blacklist, blacklist_restorer(auth)),
+    }
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(case: Case, iterations: int, warmup: int) -> Dict[str, float]:
+    """Time the case call by call with the garbage collector paused, as timeit does"""
+    func, setup = case
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        func()
+
+    latencies = []
+    gc.collect()
+    gc.disable()
+    try:
+        clock = time.perf_counter_ns
+        for _ in range(iterations):
+            if setup is not None:
+                setup()
+            start = clock()
+            func()
+            latencies.append((clock() - start) / 1000)
+    finally:
+        gc.enable()
+
+    latencies.sort()
+    total_s = sum(latencies) / 1e6
+    return {
+        "ops_per_sec": iterations / total_s if total_s else float("inf"),
+        "mean_us": statistics.fmean(latencies),
+        "p50_us": percentile(latencies, 0.50),
+        "p95_us": percentile(latencies, 0.95),
+        "p99_us": percentile(latencies, 0.99),
+        "max_us": latencies[-1],
+    }
+
+
+def peak_memory_kib(case: Case, iterations: int) -> float:
+    """Peak memory allocated by Python while running the case, in KiB"""
+    func, setup = case
+    largest = 0
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        for _ in range(iterations):
+            if setup is not None:
+                # Leave the setup's allocations out of the peak
+                setup()
+                tracemalloc.reset_peak()
+                baseline, _ = tracemalloc.get_traced_memory()
+            func()
+            largest = max(largest, tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    return largest / 1024
+
+
+def max_rss_kib() -> Optional[int]:
+    """Peak resident set size of this process, in KiB"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def run(algorithms: List[str], sizes: List[int], operations: List[str],
+        iterations: int, warmup: int, memory_iterations: int,
+        expired_fraction: float) -> List[Dict[str, Any]]:
+    results = []
+    for algorithm in algorithms:
+        for size in sizes:
+            total = warmup + iterations + memory_iterations
+            auth = make_plugin(algorithm, size, total, expired_fraction)
+            cases = make_cases(auth, total)
+            for operation in operations:
+                stats = measure(cases[operation], iterations, warmup)
+                stats["peak_alloc_kib"] = peak_memory_kib(cases[operation], memory_iterations)
+                stats["max_rss_kib"] = max_rss_kib()
+                result = {
+                    "name": f"{operation}/{algorithm}/{size}",
+                    "operation": operation,
+                    "algorithm": algorithm,
+                    "blacklist_size": size,
+                    "expired_fraction": expired_fraction,
+                    "iterations": iterations,
+                    **stats,
+                }
+                results.append(result)
+                print(f"{result['name']:<40}{stats['ops_per_sec']:>12.0f}"
+                      f"{stats['p50_us']:>10.1f}{stats['p95_us']:>10.1f}"
+                      f"{stats['p99_us']:>10.1f}{stats['peak_alloc_kib']:>12.1f}",
+                      flush=True)
+            auth.close()
+            del auth, cases
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+            max_regression: float) -> List[str]:
+    """Return a description of every case slower than the baseline allows"""
+    previous = {case["name"]: case for case in baseline}
+    regressions = []
+    for case in results:
+        old = previous.get(case["name"])
+        if old is None:
+            continue
+        change = case["ops_per_sec"] / old["ops_per_sec"] - 1
+        if change < -max_regression:
+            regressions.append(
+                f"{case['name']}: {old['ops_per_sec']:.0f} -> {case['ops_per_sec']:.0f} ops/s "
+                f"({change:+.0%})")
+    return regressions
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "pyjwt": jwt.__version__,
+        "cryptography": cryptography.__version__,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--algorithms", nargs="+", default=ALGORITHMS, choices=ALGORITHMS)
+    parser.add_argument("--sizes", nargs="+", type=int, default=BLACKLIST_SIZES,
+                        help="blacklist sizes to benchmark")
+    parser.add_argument("--operations", nargs="+", default=OPERATIONS, choices=OPERATIONS)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--memory-iterations", type=int, default=20)
+    parser.add_argument("--expired-fraction", type=float, default=0.01,
+                        help="fraction of the pre-filled blacklist already expired, "
+                             "removed by every timed clean_blacklist call")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="largest tolerated drop in ops/sec, as a fraction")
+    args = parser.parse_args()
+    if not 0 <= args.expired_fraction <= 1:
+        parser.error("--expired-fraction must be between 0 and 1")
+
+    # Short benchmark keys trigger PyJWT key length warnings on every call
+    warnings.simplefilter("ignore")
+    # Eviction warnings would be written, and timed, inside the measured calls
+    logging.getLogger("auth_plugin.jwt.blacklist").setLevel(logging.ERROR)
+
+    print(f"{'case':<40}{'ops/s':>12}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}{'peak KiB':>12}")
+    results = run(args.algorithms, args.sizes, args.operations,
+                  args.iterations, args.warmup, args.memory_iterations,
+                  args.expired_fraction)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)["results"], args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No case regressed by more than {args.max_regression:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
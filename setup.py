@@ -12,6 +12,10 @@ setup(
         "psycopg2",
         "cryptography",
     ],
+    extras_require={
+        "fast": ["orjson"],
+        "async": ["httpx"],
+    },
     author="Visesh Agarwal",
     description="A robust Python library for JWT, OAuth2, and database authentication.",
     long_description=open("README.md").read(),
@@ -1,3 +1,5 @@
+import subprocess
+import sys
 import unittest
 from unittest.mock import patch, MagicMock
 import pymongo
@@ -21,6 +23,22 @@ class TestDBManager(unittest.TestCase):
         with self.assertRaises(DBConfigurationError):
             create_db_manager(db_type="mysql", db_name="")
 
+    def test_import_is_lazy_and_leaves_logging_alone(self):
+        probe = (
+            "import logging, sys\n"
+            "import auth_plugin.db_manager\n"
+            "print(sorted(m for m in ('pymongo', 'sqlalchemy', 'mysql') if m in sys.modules))\n"
+            "print(len(logging.getLogger().handlers))\n"
+            "from auth_plugin.db_manager import MongoDBManager\n"
+            "print('pymongo' in sys.modules, 'sqlalchemy' in sys.modules)\n"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", probe], capture_output=True, text=True, check=True
+        ).stdout.split("\n")
+        self.assertEqual(output[0], "[]")
+        self.assertEqual(output[1], "0")
+        self.assertEqual(output[2], "True False")
+
 
 class TestMongoDBManager(unittest.TestCase):
     """Test cases for MongoDB manager"""
@@ -1,9 +1,42 @@
+import asyncio
+import json
+import os
+import stat
+import subprocess
+import sys
+import threading
 import pytest
 import jwt
 import time
+from unittest.mock import patch
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
 from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from cryptography.hazmat.primitives import serialization
-from auth_plugin.jwt import JWTAuthPlugin, TokenConfig, JWTError
+from cryptography.hazmat.primitives.asymmetric import rsa
+from auth_plugin.jwt import (
+    JWTAuthPlugin,
+    AsyncJWTAuthPlugin,
+    ASGIAuthMiddleware,
+    WSGIAuthMiddleware,
+    TokenConfig,
+    JWTError,
+    JWTConfigurationError,
+    JWTBlacklistedError,
+    JWTInvalidTokenError,
+    JWTSignatureError,
+    JWTTokenExpiredError,
+    PrometheusMetrics,
+    BloomFilter,
+    JWKSClient,
+    KeySet,
+    KeyStore
+)
+from auth_plugin.jwt.encoder import TokenEncoder
+from auth_plugin.jwt.utils import generate_keys, generate_rsa_keys
+from auth_plugin.jwt import plugin as plugin_module
+from auth_plugin.jwt.blacklist import ShardedBlacklist, TokenBlacklist
 
 
 class TestJWTAuthPlugin:
@@ -127,6 +160,54 @@ class TestJWTAuthPlugin:
                 jwt_auth.verify_token(token)
             assert "invalid token" in str(exc.value).lower()
 
+    def test_prevalidation_rejects_before_signature_check(self, hs256_config, user_data):
+        jwt_auth = JWTAuthPlugin(hs256_config)
+        now = int(time.time())
+        expired = jwt.encode(
+            {**user_data, "type": "access", "exp": now - 10, "iat": now - 20},
+            "test-secret-key", algorithm="HS256")
+        refresh = jwt.encode(
+            {**user_data, "type": "refresh", "exp": now + 60, "iat": now},
+            "test-secret-key", algorithm="HS256")
+        wrong_alg = jwt.encode(
+            {**user_data, "type": "access", "exp": now + 60, "iat": now},
+            "test-secret-key", algorithm="HS512")
+        bad_kid = jwt.encode(
+            {**user_data, "type": "access", "exp": now + 60, "iat": now},
+            "test-secret-key", algorithm="HS256", headers={"kid": "unknown"})
+
+        with patch("auth_plugin.jwt.plugin.jwt.decode") as decode:
+            with pytest.raises(JWTError, match="expired"):
+                jwt_auth.verify_token(expired)
+            with pytest.raises(JWTError, match="Invalid token type"):
+                jwt_auth.verify_token(refresh, "access")
+            with pytest.raises(JWTError, match="Invalid token format"):
+                jwt_auth.verify_token(wrong_alg)
+            with pytest.raises(JWTError, match="Unknown key id"):
+                jwt_auth.verify_token(bad_kid)
+            with pytest.raises(JWTError, match="Invalid token format"):
+                jwt_auth.verify_token("e30.!!!.c2ln")
+            with pytest.raises(JWTError, match="maximum size"):
+                jwt_auth.verify_token("a." + "b" * 10000 + ".c")
+            assert not decode.called
+
+        assert jwt_auth.verify_token(refresh, "refresh")["user_id"] == "123"
+
+    def test_prevalidation_keeps_strict_validation(self, hs256_config, user_data):
+        jwt_auth = JWTAuthPlugin(hs256_config)
+        access_token, _ = jwt_auth.generate_tokens(user_data)
+        forged, _ = JWTAuthPlugin(
+            TokenConfig(secret_key="other-secret-key")).generate_tokens(user_data)
+        tampered = access_token.rsplit(".", 1)[0] + "." + forged.rsplit(".", 1)[1]
+
+        with pytest.raises(JWTError, match="signature"):
+            jwt_auth.verify_token(tampered)
+
+        config = TokenConfig(secret_key="test-secret-key", max_token_size=0)
+        assert JWTAuthPlugin(config).verify_token(access_token)["user_id"] == "123"
+        with pytest.raises(JWTError, match="max_token_size"):
+            TokenConfig(secret_key="test-secret-key", max_token_size=-1)
+
     def test_config_validation(self):
         with pytest.raises(JWTError, match="secret_key is required"):
             TokenConfig(secret_key="")
@@ -142,3 +223,1181 @@ class TestJWTAuthPlugin:
                 secret_key="test",
                 access_token_expiry=-1
             )
+
+    def test_verified_token_cache(self, user_data):
+        config = TokenConfig(
+            secret_key="test-secret-key",
+            algorithm="HS256",
+            access_token_expiry=300,
+            refresh_token_expiry=3600,
+            cache_size=2
+        )
+        jwt_auth = JWTAuthPlugin(config)
+        access_token, refresh_token = jwt_auth.generate_tokens(user_data)
+
+        first = jwt_auth.verify_token(access_token)
+        first["user_id"] = "tampered"
+        second = jwt_auth.verify_token(access_token)
+        assert second["user_id"] == user_data["user_id"]
+        assert jwt_auth.cache_info() == {
+            "hits": 1, "misses": 1, "size": 1, "maxsize": 2}
+
+        with pytest.raises(JWTError, match="Invalid token type"):
+            jwt_auth.verify_token(access_token, "refresh")
+
+        # refresh_access_token mutates the payload it gets back
+        jwt_auth.refresh_access_token(refresh_token)
+        jwt_auth.refresh_access_token(refresh_token)
+        assert jwt_auth.verify_token(refresh_token, "refresh")["type"] == "refresh"
+
+        jwt_auth.blacklist_token(access_token)
+        with pytest.raises(JWTError, match="blacklisted"):
+            jwt_auth.verify_token(access_token)
+        assert jwt_auth.cache_info()["size"] == 1
+
+    def test_verified_token_cache_respects_expiry(self, user_data):
+        config = TokenConfig(
+            secret_key="test-secret-key",
+            algorithm="HS256",
+            access_token_expiry=1,
+            refresh_token_expiry=2,
+            cache_size=16
+        )
+        jwt_auth = JWTAuthPlugin(config)
+        access_token, _ = jwt_auth.generate_tokens(user_data)
+        jwt_auth.verify_token(access_token)
+
+        time.sleep(2)
+        with pytest.raises(JWTError, match="expired"):
+            jwt_auth.verify_token(access_token)
+
+    def test_verified_token_cache_disabled_by_default(self, hs256_config):
+        assert JWTAuthPlugin(hs256_config).cache_info() is None
+
+    def test_negative_cache(self, user_data):
+        config = TokenConfig(
+            secret_key="test-secret-key",
+            algorithm="HS256",
+            negative_cache_size=16,
+            negative_cache_ttl=60
+        )
+        jwt_auth = JWTAuthPlugin(config)
+        forged, _ = JWTAuthPlugin(
+            TokenConfig(secret_key="other-secret-key")).generate_tokens(user_data)
+
+        with pytest.raises(JWTError, match="signature"):
+            jwt_auth.verify_token(forged)
+        with patch.object(jwt_auth, "_verify_signature") as verify:
+            for _ in range(3):
+                with pytest.raises(JWTError, match="signature") as exc:
+                    jwt_auth.verify_token(forged)
+            assert not verify.called
+        assert exc.value.error_code == "INVALID_SIGNATURE"
+
+        # Cached per expected type; other failures are counted separately
+        access_token, _ = jwt_auth.generate_tokens(user_data)
+        for _ in range(2):
+            with pytest.raises(JWTError, match="Invalid token type"):
+                jwt_auth.verify_token(access_token, "refresh")
+        assert jwt_auth.verify_token(access_token)["user_id"] == "123"
+
+        info = jwt_auth.negative_cache_info()
+        assert info["size"] == 2
+        assert info["reasons"] == {"Invalid token signature": 3, "Invalid token type": 1}
+
+    def test_negative_cache_invalidated_by_key_change(self, user_data):
+        config = TokenConfig(secret_key="test-secret-key", negative_cache_size=16)
+        jwt_auth = JWTAuthPlugin(config)
+        signer = JWTAuthPlugin(TokenConfig(secret_key="new-secret-key", key_id="2024-06"))
+        token, _ = signer.generate_tokens(user_data)
+
+        with pytest.raises(JWTError, match="Unknown key id"):
+            jwt_auth.verify_token(token)
+        jwt_auth.keyset.add("2024-06", secret_key="new-secret-key")
+        assert jwt_auth.verify_token(token)["user_id"] == "123"
+
+    def test_negative_cache_invalidated_by_config_key_change(self, user_data):
+        config = TokenConfig(secret_key="test-secret-key", negative_cache_size=16)
+        jwt_auth = JWTAuthPlugin(config)
+        token, _ = JWTAuthPlugin(TokenConfig(secret_key="new-secret-key")).generate_tokens(user_data)
+
+        for _ in range(2):
+            with pytest.raises(JWTSignatureError):
+                jwt_auth.verify_token(token)
+        config.secret_key = "new-secret-key"
+        assert jwt_auth.verify_token(token)["user_id"] == "123"
+
+    def test_negative_cache_config(self, hs256_config):
+        assert JWTAuthPlugin(hs256_config).negative_cache_info() is None
+        with pytest.raises(JWTConfigurationError):
+            TokenConfig(secret_key="test", negative_cache_size=-1)
+        with pytest.raises(JWTConfigurationError):
+            TokenConfig(secret_key="test", negative_cache_ttl=0)
+
+    def test_verify_tokens_batch(self, rs256_config, user_data):
+        jwt_auth = JWTAuthPlugin(rs256_config)
+        access_token, refresh_token = jwt_auth.generate_tokens(user_data)
+        tokens = [access_token, "invalid", refresh_token, access_token]
+
+        for executor in (None, ThreadPoolExecutor(max_workers=4)):
+            results = jwt_auth.verify_tokens(tokens, executor=executor)
+            assert len(results) == 4
+            assert results[0]["user_id"] == user_data["user_id"]
+            assert isinstance(results[1], JWTError)
+            assert isinstance(results[2], JWTError)
+            assert "Invalid token type" in str(results[2])
+            assert results[3]["user_id"] == user_data["user_id"]
+            if executor is not None:
+                executor.shutdown()
+
+    def test_verify_tokens_process_pool(self, user_data):
+        config = TokenConfig(
+            secret_key="test-secret-key",
+            algorithm="HS256",
+            cache_size=8
+        )
+        jwt_auth = JWTAuthPlugin(config)
+        access_token, _ = jwt_auth.generate_tokens(user_data)
+
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            results = jwt_auth.verify_tokens(
+                [access_token, "a.b.c"], executor=pool, chunksize=2)
+        assert results[0]["user_id"] == user_data["user_id"]
+        assert isinstance(results[1], JWTError)
+        assert results[1].error_code == "INVALID_TOKEN"
+
+    def test_verify_tokens_spawned_workers_see_blacklist(self, user_data):
+        config = TokenConfig(
+            secret_key="test-secret-key",
+            algorithm="HS256",
+            max_blacklist_size=10000
+        )
+        jwt_auth = JWTAuthPlugin(config)
+        tokens = [jwt_auth.generate_tokens({**user_data, "user_id": str(i)})[0]
+                  for i in range(50)]
+        for token in tokens:
+            jwt_auth.blacklist_token(token)
+
+        # Spawned workers hash with a different seed than this process
+        with ProcessPoolExecutor(max_workers=2, mp_context=get_context("spawn")) as pool:
+            results = jwt_auth.verify_tokens(tokens, executor=pool)
+        assert all(isinstance(result, JWTError) for result in results)
+        assert {result.error_code for result in results} == {"TOKEN_BLACKLISTED"}
+
+    def test_verify_worker_payload_has_no_private_keys(self, rs256_config, user_data):
+        jwt_auth = JWTAuthPlugin(rs256_config)
+        access_token, _ = jwt_auth.generate_tokens(user_data)
+        payload = jwt_auth._worker_payload(verify_only=True)
+        assert b"PRIVATE KEY" not in payload[1]
+        assert b"PRIVATE KEY" in jwt_auth._worker_payload(verify_only=False)[1]
+
+        worker = plugin_module._load_worker_plugin(payload)
+        assert worker.keyset.get(None).signing_key is None
+        assert plugin_module._verify_in_worker(payload, access_token, "access")["user_id"] == "123"
+        # The worker keeps its plugin while the state is unchanged
+        assert plugin_module._load_worker_plugin(payload) is worker
+        jwt_auth.blacklist_token(access_token)
+        payload = jwt_auth._worker_payload(verify_only=True)
+        assert plugin_module._load_worker_plugin(payload) is not worker
+        assert isinstance(plugin_module._verify_in_worker(payload, access_token, "access"),
+                          JWTBlacklistedError)
+
+    def test_generate_tokens_bulk(self, rs256_config):
+        jwt_auth = JWTAuthPlugin(rs256_config)
+        users = [{"user_id": str(i)} for i in range(5)]
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            for executor in (None, pool):
+                with patch.object(jwt_auth, "_signing_entry",
+                                  wraps=jwt_auth._signing_entry) as signing_entry:
+                    pairs = list(jwt_auth.generate_tokens_bulk(iter(users), executor=executor))
+                assert signing_entry.call_count == 1
+                assert len(pairs) == len(users)
+                issued = set()
+                for user, (access_token, refresh_token) in zip(users, pairs):
+                    access = jwt_auth.verify_token(access_token)
+                    refresh = jwt_auth.verify_token(refresh_token, "refresh")
+                    assert access["user_id"] == refresh["user_id"] == user["user_id"]
+                    issued.add(access["iat"])
+                    issued.add(refresh["iat"])
+                assert len(issued) == 1
+
+    def test_rsa_keys_parsed_once(self, rs256_config, user_data):
+        jwt_auth = JWTAuthPlugin(rs256_config)
+        signing_key = jwt_auth.keyset.active().signing_key
+        assert isinstance(signing_key, rsa.RSAPrivateKey)
+        assert isinstance(jwt_auth.keyset.active().verification_key, rsa.RSAPublicKey)
+
+        access_token, _ = jwt_auth.generate_tokens(user_data)
+        jwt_auth.verify_token(access_token)
+        assert jwt_auth.keyset.active().signing_key is signing_key
+
+        # Rotating the key material on the config reloads the parsed keys
+        private_key, public_key = JWTAuthPlugin.generate_rsa_keys()
+        rs256_config.private_key = private_key
+        rs256_config.public_key = public_key
+        with pytest.raises(JWTError, match="signature"):
+            jwt_auth.verify_token(access_token)
+        assert jwt_auth.keyset.active().signing_key is not signing_key
+
+    def test_invalid_rsa_key_rejected(self):
+        config = TokenConfig(
+            secret_key="test-key",
+            algorithm="RS256",
+            private_key=b"not a key",
+            public_key=b"not a key"
+        )
+        with pytest.raises(JWTConfigurationError):
+            JWTAuthPlugin(config)
+
+    def test_blacklist_size_limit_evicts_soonest_expiring(self, user_data):
+        config = TokenConfig(
+            secret_key="test-secret-key",
+            algorithm="HS256",
+            access_token_expiry=300,
+            refresh_token_expiry=3600,
+            max_blacklist_size=2
+        )
+        jwt_auth = JWTAuthPlugin(config)
+        first_access, first_refresh = jwt_auth.generate_tokens({"user_id": "1"})
+        second_access, _ = jwt_auth.generate_tokens({"user_id": "2"})
+
+        jwt_auth.blacklist_token(first_refresh)
+        jwt_auth.blacklist_token(first_access)
+        jwt_auth.blacklist_token(second_access)
+
+        assert len(jwt_auth._blacklisted_tokens) == 2
+        assert first_refresh in jwt_auth._blacklisted_tokens
+        assert second_access in jwt_auth._blacklisted_tokens
+        assert first_access not in jwt_auth._blacklisted_tokens
+
+    def test_blacklist_remove_expired(self):
+        blacklist = TokenBlacklist(max_size=100)
+        for i in range(10):
+            blacklist.add(f"token-{i}", exp=float(i))
+        blacklist.add("token-0", exp=50.0)
+        blacklist.discard("token-9")
+
+        assert blacklist.remove_expired(now=5.0) == 5
+        assert "token-0" in blacklist
+        assert "token-5" not in blacklist
+        assert "token-6" in blacklist
+        assert blacklist.remove_expired(now=100.0) == 4
+        assert len(blacklist) == 0
+
+    def test_sharded_blacklist(self):
+        assert ShardedBlacklist(max_size=100, shards=16).shard_count == 1
+        blacklist = ShardedBlacklist(max_size=10000, filter_error_rate=0.01, shards=8)
+        assert blacklist.shard_count == 8
+
+        for i in range(1000):
+            blacklist.add(f"token-{i}", exp=float(i))
+        assert len(blacklist) == 1000
+        assert all(f"token-{i}" in blacklist for i in range(1000))
+        assert "token-1000" not in blacklist
+
+        assert blacklist.remove_expired(now=499.0) == 500
+        snapshot = BloomFilter.from_bytes(blacklist.filter_snapshot())
+        assert all(f"token-{i}" in snapshot for i in range(500, 1000))
+        assert "token-0" not in blacklist
+
+    def test_sharded_blacklist_global_size_limit(self):
+        blacklist = ShardedBlacklist(max_size=1000, shards=8)
+        assert blacklist.shard_count == 8
+
+        # Later entries expire sooner, so once the blacklist is full every
+        # new entry is the one evicted, whichever shard it landed in
+        for i in range(1200):
+            blacklist.add(f"token-{i}", exp=float(10000 - i))
+            assert len(blacklist) == min(i + 1, 1000)
+        assert all(f"token-{i}" in blacklist for i in range(1000))
+        assert all(f"token-{i}" not in blacklist for i in range(1000, 1200))
+
+        blacklist.add("token-late", exp=20000.0)
+        assert len(blacklist) == 1000
+        assert "token-late" in blacklist
+        assert "token-999" not in blacklist
+        assert "token-998" in blacklist
+
+    def test_concurrent_verify_and_blacklist(self, user_data):
+        config = TokenConfig(
+            secret_key="test-secret-key",
+            algorithm="HS256",
+            max_blacklist_size=100000,
+            cache_size=64
+        )
+        jwt_auth = JWTAuthPlugin(config)
+        tokens = [jwt_auth.generate_tokens({**user_data, "user_id": str(i)})[0]
+                  for i in range(400)]
+        revoked = set(tokens[::2])
+        errors = []
+        start = threading.Barrier(17)
+
+        def revoke(chunk):
+            start.wait()
+            for token in chunk:
+                jwt_auth.blacklist_token(token)
+                jwt_auth.clean_blacklist()
+
+        def verify(offset):
+            start.wait()
+            for token in tokens[offset::8]:
+                try:
+                    jwt_auth.verify_token(token)
+                except JWTBlacklistedError:
+                    if token not in revoked:
+                        errors.append(f"valid token rejected: {token}")
+                except Exception as e:
+                    errors.append(repr(e))
+
+        revoked_list = sorted(revoked)
+        threads = [threading.Thread(target=revoke, args=(revoked_list[i::8],)) for i in range(8)]
+        threads += [threading.Thread(target=verify, args=(i,)) for i in range(8)]
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for thread in threads:
+                thread.start()
+            start.wait()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+
+        assert errors == []
+        # No revocation may be lost, and only revoked tokens are rejected
+        assert len(jwt_auth._blacklisted_tokens) == len(revoked)
+        for token in tokens:
+            if token in revoked:
+                with pytest.raises(JWTBlacklistedError):
+                    jwt_auth.verify_token(token)
+            else:
+                assert jwt_auth.verify_token(token)["type"] == "access"
+
+    def test_jti_revocation(self, user_data):
+        config = TokenConfig(
+            secret_key="test-secret-key",
+            algorithm="HS256",
+            use_jti=True,
+            cache_size=8
+        )
+        jwt_auth = JWTAuthPlugin(config)
+        access_token, refresh_token = jwt_auth.generate_tokens(user_data)
+        access = jwt_auth.verify_token(access_token)
+        refresh = jwt_auth.verify_token(refresh_token, "refresh")
+        assert access["jti"] != refresh["jti"]
+
+        new_access_token = jwt_auth.refresh_access_token(refresh_token)
+        assert jwt_auth.verify_token(new_access_token)["jti"] != refresh["jti"]
+
+        jwt_auth.blacklist_token(access_token)
+        assert access_token not in jwt_auth._blacklisted_tokens
+        assert JWTAuthPlugin._jti_key(access["jti"]) in jwt_auth._blacklisted_tokens
+        assert len(JWTAuthPlugin._jti_key(access["jti"])) == 16
+        with pytest.raises(JWTError, match="blacklisted"):
+            jwt_auth.verify_token(access_token)
+        assert jwt_auth.verify_token(new_access_token)["user_id"] == "123"
+
+    def test_blacklist_bloom_filter(self, user_data):
+        config = TokenConfig(
+            secret_key="test-secret-key",
+            algorithm="HS256",
+            access_token_expiry=1,
+            refresh_token_expiry=3600,
+            blacklist_filter_error_rate=0.01
+        )
+        jwt_auth = JWTAuthPlugin(config)
+        access_token, refresh_token = jwt_auth.generate_tokens(user_data)
+        jwt_auth.blacklist_token(access_token)
+        jwt_auth.blacklist_token(refresh_token)
+
+        with pytest.raises(JWTError, match="blacklisted"):
+            jwt_auth.verify_token(access_token)
+
+        snapshot = BloomFilter.from_bytes(jwt_auth.blacklist_filter_snapshot())
+        assert access_token in snapshot
+        assert refresh_token in snapshot
+
+        time.sleep(2)
+        jwt_auth.clean_blacklist()
+        snapshot = BloomFilter.from_bytes(jwt_auth.blacklist_filter_snapshot())
+        assert access_token not in snapshot
+        assert refresh_token in snapshot
+
+    def test_bloom_filter_error_rate(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"revoked-{i}".encode())
+        assert all(f"revoked-{i}".encode() in bloom for i in range(1000))
+
+        false_positives = sum(f"valid-{i}" in bloom for i in range(10000))
+        assert false_positives < 300
+
+        with pytest.raises(JWTError):
+            BloomFilter.from_bytes(b"junk")
+
+
+class TestAsyncJWTAuthPlugin:
+    @pytest.fixture
+    def config(self):
+        return TokenConfig(
+            secret_key="test-secret-key",
+            algorithm="HS256",
+            cache_size=16
+        )
+
+    def test_async_round_trip(self, config):
+        async def scenario():
+            async with AsyncJWTAuthPlugin(config, max_workers=2, max_concurrency=2) as auth:
+                pairs = await asyncio.gather(
+                    *(auth.generate_tokens({"user_id": str(i)}) for i in range(8)))
+                payloads = await asyncio.gather(
+                    *(auth.verify_token(access) for access, _ in pairs))
+                assert [p["user_id"] for p in payloads] == [str(i) for i in range(8)]
+
+                access_token, refresh_token = pairs[0]
+                new_access = await auth.refresh_access_token(refresh_token)
+                assert (await auth.verify_token(new_access))["type"] == "access"
+
+                await auth.blacklist_token(access_token)
+                with pytest.raises(JWTError, match="blacklisted"):
+                    await auth.verify_token(access_token)
+                return auth
+
+        auth = asyncio.run(scenario())
+        assert auth.plugin.cache_info()["misses"] == 9
+
+    def test_async_cache_hit_runs_inline(self, config):
+        async def scenario():
+            auth = AsyncJWTAuthPlugin(config)
+            access_token, _ = await auth.generate_tokens({"user_id": "123"})
+            await auth.verify_token(access_token)
+            with patch.object(auth, "_run", side_effect=AssertionError("offloaded")):
+                payload = await auth.verify_token(access_token)
+            await auth.close()
+            return payload
+
+        assert asyncio.run(scenario())["user_id"] == "123"
+
+    def test_async_close_leaves_caller_plugin_open(self, config):
+        plugin = JWTAuthPlugin(config)
+
+        async def scenario():
+            async with AsyncJWTAuthPlugin(plugin) as auth:
+                await auth.generate_tokens({"user_id": "123"})
+            async with AsyncJWTAuthPlugin(config) as owned:
+                pass
+            return owned
+
+        with patch.object(plugin, "close") as close:
+            owned = asyncio.run(scenario())
+        assert not close.called
+        assert owned.plugin._sync_stop.is_set()
+
+    def test_async_plugin_survives_successive_event_loops(self, config):
+        auth = AsyncJWTAuthPlugin(config, max_concurrency=1)
+
+        async def scenario(count):
+            # Two callers contend for the single slot on each loop
+            return await asyncio.gather(
+                *(auth.generate_tokens({"user_id": str(i)}) for i in range(count)))
+
+        for _ in range(2):
+            assert len(asyncio.run(scenario(2))) == 2
+        asyncio.run(auth.close())
+
+    def test_async_invalid_concurrency(self, config):
+        with pytest.raises(JWTConfigurationError):
+            AsyncJWTAuthPlugin(config, max_concurrency=0)
+
+
+class TestMiddleware:
+    @pytest.fixture
+    def auth(self):
+        return JWTAuthPlugin(TokenConfig(secret_key="test-secret-key", algorithm="HS256"))
+
+    @staticmethod
+    def call_asgi(middleware, headers=(), path="/items", scope_type="http"):
+        scope = {"type": scope_type, "path": path, "headers": list(headers), "state": {}}
+        seen = {}
+        sent = []
+
+        async def app(scope, receive, send):
+            seen["auth"] = scope.get("auth", "unset")
+            seen["state"] = scope["state"].get("auth")
+
+        async def send(message):
+            sent.append(message)
+
+        middleware.app = app
+
+        async def scenario():
+            await middleware(scope, None, send)
+            await middleware.auth.close()
+
+        asyncio.run(scenario())
+        return seen, sent
+
+    @staticmethod
+    def call_wsgi(middleware, authorization=None, path="/items"):
+        environ = {"PATH_INFO": path}
+        if authorization is not None:
+            environ["HTTP_AUTHORIZATION"] = authorization
+        seen = {}
+        status = []
+
+        def app(environ, start_response):
+            seen["auth"] = environ.get(WSGIAuthMiddleware.ENVIRON_KEY, "unset")
+            start_response("200 OK", [])
+            return [b"ok"]
+
+        middleware.app = app
+        body = middleware(environ, lambda s, headers: status.append((s, dict(headers))))
+        return seen, status[0], b"".join(body)
+
+    def test_asgi_attaches_claims(self, auth):
+        access_token, _ = auth.generate_tokens({"user_id": "123"})
+        for header in (b"Bearer " + access_token.encode(), b"bearer   " + access_token.encode()):
+            seen, sent = self.call_asgi(ASGIAuthMiddleware(None, auth), [(b"authorization", header)])
+            assert not sent
+            assert seen["auth"]["user_id"] == "123"
+            assert seen["state"]["user_id"] == "123"
+
+    def test_asgi_leaves_server_scope_unchanged(self, auth):
+        access_token, _ = auth.generate_tokens({"user_id": "123"})
+        middleware = ASGIAuthMiddleware(None, auth)
+        scope = {"type": "http", "path": "/items", "state": {},
+                 "headers": [(b"authorization", b"Bearer " + access_token.encode())]}
+
+        async def app(scope, receive, send):
+            assert scope["auth"]["user_id"] == "123"
+
+        middleware.app = app
+        asyncio.run(middleware(scope, None, None))
+        asyncio.run(middleware.auth.close())
+        assert "auth" not in scope
+        assert scope["state"]["auth"]["user_id"] == "123"
+
+    def test_asgi_lifespan_shutdown_closes_wrapped_plugin(self, auth):
+        sent = []
+
+        async def app(scope, receive, send):
+            await send({"type": "lifespan.startup.complete"})
+            await send({"type": "lifespan.shutdown.complete"})
+
+        async def send(message):
+            sent.append(message["type"])
+
+        middleware = ASGIAuthMiddleware(app, auth)
+        asyncio.run(middleware({"type": "lifespan"}, None, send))
+        assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+        assert middleware.auth._executor._shutdown
+
+        async_auth = AsyncJWTAuthPlugin(auth)
+        asyncio.run(ASGIAuthMiddleware(app, async_auth)({"type": "lifespan"}, None, send))
+        assert not async_auth._executor._shutdown
+        asyncio.run(async_auth.close())
+
+    def test_asgi_rejects_invalid_requests(self, auth):
+        _, refresh_token = auth.generate_tokens({"user_id": "123"})
+        cases = [
+            ([], "MISSING_TOKEN", b"Bearer"),
+            ([(b"authorization", b"Basic dXNlcjpwYXNz")], "INVALID_TOKEN", b'Bearer error="invalid_token"'),
+            ([(b"authorization", b"Bearer " + refresh_token.encode())], "INVALID_TOKEN",
+             b'Bearer error="invalid_token"'),
+        ]
+        for headers, error_code, challenge in cases:
+            seen, sent = self.call_asgi(ASGIAuthMiddleware(None, auth), headers)
+            assert seen == {}
+            assert sent[0]["status"] == 401
+            assert dict(sent[0]["headers"])[b"www-authenticate"] == challenge
+            assert json.loads(sent[1]["body"])["error_code"] == error_code
+
+    def test_asgi_exempt_optional_and_websocket(self, auth):
+        seen, sent = self.call_asgi(ASGIAuthMiddleware(None, auth, exempt_paths={"/health"}), path="/health")
+        assert seen["auth"] == "unset" and not sent
+
+        seen, sent = self.call_asgi(ASGIAuthMiddleware(None, auth, optional=True))
+        assert seen["auth"] is None and not sent
+
+        seen, sent = self.call_asgi(ASGIAuthMiddleware(None, auth), scope_type="websocket")
+        assert sent == [{"type": "websocket.close", "code": 1008}]
+
+    def test_wsgi_middleware(self, auth):
+        access_token, _ = auth.generate_tokens({"user_id": "123"})
+        middleware = WSGIAuthMiddleware(None, auth, exempt_paths={"/health"}, realm="api")
+
+        seen, status, body = self.call_wsgi(middleware, f"Bearer {access_token}")
+        assert seen["auth"]["user_id"] == "123" and status[0] == "200 OK"
+
+        seen, status, body = self.call_wsgi(middleware, "Bearer not-a-token")
+        assert seen == {}
+        assert status[0] == "401 Unauthorized"
+        assert status[1]["WWW-Authenticate"] == 'Bearer realm="api", error="invalid_token"'
+        assert json.loads(body)["error_code"] == "INVALID_TOKEN"
+
+        seen, status, _ = self.call_wsgi(middleware)
+        assert status[1]["WWW-Authenticate"] == 'Bearer realm="api"'
+
+        seen, status, _ = self.call_wsgi(middleware, path="/health")
+        assert seen["auth"] == "unset" and status[0] == "200 OK"
+
+
+class StubJWKSServer:
+    """Local JWKS endpoint serving the public halves of the keys in `keys`"""
+
+    def __init__(self):
+        self.keys = {}
+        self.fetches = 0
+        self.fail = False
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub.fetches += 1
+                if stub.fail:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                jwks = []
+                for kid, private_key in stub.keys.items():
+                    jwk = jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+                    jwks.append({**jwk, "kid": kid, "use": "sig", "alg": "RS256"})
+                body = json.dumps({"keys": jwks}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/.well-known/jwks.json"
+        threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def add_key(self, kid):
+        self.keys[kid] = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        return self.keys[kid]
+
+    def token(self, kid, **claims):
+        payload = {"sub": "user1", "iss": "https://issuer.test", "aud": "api",
+                   "exp": int(time.time()) + 600, **claims}
+        return jwt.encode(payload, self.keys[kid], algorithm="RS256", headers={"kid": kid})
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestJWKS:
+    @pytest.fixture
+    def stub(self):
+        stub = StubJWKSServer()
+        stub.add_key("provider-1")
+        yield stub
+        stub.stop()
+
+    @pytest.fixture
+    def config(self):
+        return TokenConfig(secret_key="test-secret-key", issuer="https://issuer.test", audience="api")
+
+    def test_verifies_third_party_tokens(self, stub, config):
+        jwks = JWKSClient(stub.url, refresh_interval=0)
+        auth = JWTAuthPlugin(config, jwks=jwks)
+
+        payload = auth.verify_token(stub.token("provider-1"), token_type=None)
+        assert payload["sub"] == "user1"
+        assert len(jwks) == 1 and stub.fetches == 1
+
+        with pytest.raises(JWTInvalidTokenError):
+            auth.verify_token(stub.token("provider-1", aud="other"), token_type=None)
+        with pytest.raises(JWTInvalidTokenError):
+            auth.verify_token(stub.token("provider-1", iss="https://evil.test"), token_type=None)
+        # Third-party tokens have no type claim
+        with pytest.raises(JWTInvalidTokenError):
+            auth.verify_token(stub.token("provider-1"))
+
+        # Local tokens keep working, with or without the type check
+        access_token, _ = auth.generate_tokens({"user_id": "123"})
+        assert auth.verify_token(access_token)["user_id"] == "123"
+        assert auth.verify_token(access_token, token_type=None)["type"] == "access"
+        jwks.close()
+
+    def test_audience_checked_without_configured_audience(self, stub):
+        jwks = JWKSClient(stub.url, refresh_interval=0)
+        auth = JWTAuthPlugin(TokenConfig(secret_key="test-secret-key"), jwks=jwks)
+
+        # Tokens issued to another client must not pass
+        with pytest.raises(JWTInvalidTokenError):
+            auth.verify_token(stub.token("provider-1", aud="some-other-app"), token_type=None)
+        payload = {"sub": "user1", "exp": int(time.time()) + 600}
+        token = jwt.encode(payload, stub.keys["provider-1"], algorithm="RS256",
+                           headers={"kid": "provider-1"})
+        assert auth.verify_token(token, token_type=None)["sub"] == "user1"
+        jwks.close()
+
+    def test_token_without_kid_uses_single_jwks_key(self, stub, config):
+        jwks = JWKSClient(stub.url, refresh_interval=0, min_refetch_interval=60)
+        auth = JWTAuthPlugin(config, jwks=jwks)
+        payload = {"sub": "user1", "iss": "https://issuer.test", "aud": "api",
+                   "exp": int(time.time()) + 600}
+        token = jwt.encode(payload, stub.keys["provider-1"], algorithm="RS256")
+        assert "kid" not in jwt.get_unverified_header(token)
+
+        assert auth.verify_token(token, token_type=None)["sub"] == "user1"
+        # The local key still verifies its own tokens, which carry no kid
+        access_token, _ = auth.generate_tokens({"user_id": "123"})
+        assert auth.verify_token(access_token)["user_id"] == "123"
+
+        # With several provider keys a token without kid is ambiguous
+        stub.add_key("provider-2")
+        jwks.refresh()
+        with pytest.raises(JWTInvalidTokenError, match="Invalid token format"):
+            auth.verify_token(token, token_type=None)
+        jwks.close()
+
+    def test_unknown_kid_triggers_one_rate_limited_refetch(self, stub, config):
+        jwks = JWKSClient(stub.url, refresh_interval=0, min_refetch_interval=0.2)
+        auth = JWTAuthPlugin(config, jwks=jwks)
+        time.sleep(0.25)
+
+        stub.add_key("provider-2")
+        assert auth.verify_token(stub.token("provider-2"), token_type=None)["sub"] == "user1"
+        assert stub.fetches == 2
+
+        stub.add_key("provider-3")
+        for _ in range(3):
+            with pytest.raises(JWTInvalidTokenError, match="Unknown key id"):
+                auth.verify_token(stub.token("provider-3"), token_type=None)
+        assert stub.fetches == 2
+
+        time.sleep(0.25)
+        assert auth.verify_token(stub.token("provider-3"), token_type=None)["sub"] == "user1"
+        assert stub.fetches == 3
+        jwks.close()
+
+    def test_background_refresh(self, stub, config):
+        jwks = JWKSClient(stub.url, refresh_interval=0.05, min_refetch_interval=60)
+        auth = JWTAuthPlugin(config, jwks=jwks)
+        stub.add_key("provider-2")
+        deadline = time.time() + 2
+        while "provider-2" not in jwks and time.time() < deadline:
+            time.sleep(0.01)
+        assert "provider-2" in jwks
+        version = jwks.version
+
+        # A failing endpoint leaves the loaded keys in place
+        stub.fail = True
+        fetches = stub.fetches
+        while stub.fetches < fetches + 2 and time.time() < deadline:
+            time.sleep(0.01)
+        jwks.close()
+        assert jwks.version == version
+        assert auth.verify_token(stub.token("provider-2"), token_type=None)["sub"] == "user1"
+
+    def test_negative_cache_follows_jwks_version(self, stub):
+        config = TokenConfig(secret_key="test-secret-key", audience="api", negative_cache_size=16)
+        jwks = JWKSClient(stub.url, refresh_interval=0, min_refetch_interval=60)
+        auth = JWTAuthPlugin(config, jwks=jwks)
+        stub.add_key("provider-2")
+        token = stub.token("provider-2")
+        with pytest.raises(JWTInvalidTokenError, match="Unknown key id"):
+            auth.verify_token(token, token_type=None)
+
+        jwks.refresh()
+        assert auth.verify_token(token, token_type=None)["sub"] == "user1"
+        jwks.close()
+
+    def test_async_refetch_runs_on_executor(self, stub, config):
+        jwks = JWKSClient(stub.url, refresh_interval=0, min_refetch_interval=0)
+        stub.add_key("provider-2")
+
+        async def scenario():
+            async with AsyncJWTAuthPlugin(JWTAuthPlugin(config, jwks=jwks)) as auth:
+                return await auth.verify_token(stub.token("provider-2"), token_type=None)
+
+        assert asyncio.run(scenario())["sub"] == "user1"
+        assert stub.fetches == 2
+        jwks.close()
+
+    def test_ignores_unusable_keys(self, stub):
+        jwks = JWKSClient(stub.url, refresh_interval=0)
+        keys = jwks._parse([
+            {"kty": "oct", "k": "c2VjcmV0", "kid": "hmac"},
+            {**jwks._jwks[0], "kid": "enc", "use": "enc"},
+            {"kty": "RSA", "kid": "broken", "n": "AQAB", "e": "AQAB"},
+            {**jwks._jwks[0], "kid": "no-alg", "alg": None},
+        ])
+        assert list(keys) == ["no-alg"] and keys["no-alg"].algorithm == "RS256"
+        jwks.close()
+
+    def test_initial_fetch_failure(self, stub):
+        stub.fail = True
+        with pytest.raises(JWTConfigurationError):
+            JWKSClient(stub.url, refresh_interval=0)
+
+
+class TestKeyStore:
+    def test_workers_share_persisted_keys(self, tmp_path):
+        path = tmp_path / "keys" / "jwt.pem"
+        config = TokenConfig(secret_key="key-id", algorithm="RS256", keystore_path=str(path))
+        first = JWTAuthPlugin(config)
+        second = JWTAuthPlugin(TokenConfig(
+            secret_key="key-id", algorithm="RS256", keystore_path=str(path)))
+
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+        access_token, _ = first.generate_tokens({"user_id": "123"})
+        assert second.verify_token(access_token)["user_id"] == "123"
+
+    def test_prepare_next_and_rotate(self, tmp_path):
+        keystore = KeyStore(str(tmp_path / "jwt.pem"))
+        current = keystore.load_or_create()
+        keystore.prepare_next().join()
+        assert os.path.exists(keystore.next_path)
+
+        rotated = keystore.rotate()
+        assert rotated != current
+        assert keystore.load_or_create() == rotated
+        assert not os.path.exists(keystore.next_path)
+
+    def test_invalid_key_file(self, tmp_path):
+        path = tmp_path / "jwt.pem"
+        path.write_bytes(b"")
+        with pytest.raises(JWTConfigurationError):
+            KeyStore(str(path)).load_or_create()
+
+    def test_min_key_size_enforced(self):
+        with pytest.raises(JWTConfigurationError, match="below the minimum"):
+            generate_rsa_keys(1024)
+
+        private_key, public_key = JWTAuthPlugin.generate_rsa_keys()
+        config = TokenConfig(
+            secret_key="key-id",
+            algorithm="RS256",
+            private_key=private_key,
+            public_key=public_key,
+            min_key_size=3072
+        )
+        with pytest.raises(JWTConfigurationError, match="below the minimum"):
+            JWTAuthPlugin(config)
+
+
+class TestKeyRotation:
+    @pytest.fixture
+    def config(self):
+        private_key, public_key = JWTAuthPlugin.generate_rsa_keys()
+        return TokenConfig(
+            secret_key="key-id",
+            algorithm="RS256",
+            private_key=private_key,
+            public_key=public_key,
+            key_id="2024-01",
+            cache_size=8
+        )
+
+    def test_rotation_keeps_old_tokens_valid_until_retired(self, config):
+        jwt_auth = JWTAuthPlugin(config)
+        old_token, _ = jwt_auth.generate_tokens({"user_id": "123"})
+        assert jwt.get_unverified_header(old_token)["kid"] == "2024-01"
+        jwt_auth.verify_token(old_token)
+
+        private_key, public_key = JWTAuthPlugin.generate_rsa_keys()
+        jwt_auth.keyset.add("2024-06", private_key=private_key,
+                            public_key=public_key, activate=True)
+        new_token, _ = jwt_auth.generate_tokens({"user_id": "123"})
+        assert jwt.get_unverified_header(new_token)["kid"] == "2024-06"
+        assert jwt_auth.verify_token(old_token)["user_id"] == "123"
+        assert jwt_auth.verify_token(new_token)["user_id"] == "123"
+
+        jwt_auth.keyset.retire("2024-01")
+        with pytest.raises(JWTError, match="Unknown key id"):
+            jwt_auth.verify_token(old_token)
+        assert jwt_auth.verify_token(new_token)["user_id"] == "123"
+
+        with pytest.raises(JWTConfigurationError):
+            jwt_auth.keyset.retire("2024-06")
+
+    def test_rotation_through_config(self, config):
+        jwt_auth = JWTAuthPlugin(config)
+        old_token, _ = jwt_auth.generate_tokens({"user_id": "123"})
+
+        config.private_key, config.public_key = JWTAuthPlugin.generate_rsa_keys()
+        config.key_id = "2024-06"
+        new_token, _ = jwt_auth.generate_tokens({"user_id": "123"})
+        assert jwt.get_unverified_header(new_token)["kid"] == "2024-06"
+        assert jwt_auth.verify_token(old_token)["user_id"] == "123"
+        assert set(k["kid"] for k in jwt_auth.keyset.to_jwks()["keys"]) == {"2024-01", "2024-06"}
+
+    def test_replacing_key_under_same_kid_drops_cached_tokens(self, config):
+        jwt_auth = JWTAuthPlugin(config)
+        token, _ = jwt_auth.generate_tokens({"user_id": "123"})
+        assert jwt_auth.verify_token(token)["user_id"] == "123"
+
+        private_key, public_key = JWTAuthPlugin.generate_rsa_keys()
+        jwt_auth.keyset.add("2024-01", private_key=private_key, public_key=public_key)
+        with pytest.raises(JWTSignatureError):
+            jwt_auth.verify_token(token)
+
+        # Same for a new key on the config, before anything else syncs it
+        jwt_auth = JWTAuthPlugin(config)
+        token, _ = jwt_auth.generate_tokens({"user_id": "123"})
+        assert jwt_auth.verify_token(token)["user_id"] == "123"
+        config.private_key, config.public_key = JWTAuthPlugin.generate_rsa_keys()
+        with pytest.raises(JWTSignatureError):
+            jwt_auth.verify_token(token)
+
+    def test_jwks_export_and_reload(self, config):
+        jwt_auth = JWTAuthPlugin(config)
+        jwks = jwt_auth.keyset.to_jwks()
+        assert len(jwks["keys"]) == 1
+        jwk = jwks["keys"][0]
+        assert jwk["kty"] == "RSA"
+        assert jwk["kid"] == "2024-01"
+        assert jwk["alg"] == "RS256"
+        assert "d" not in jwk
+
+        token, _ = jwt_auth.generate_tokens({"user_id": "123"})
+        public = jwt.PyJWK(jwk).key
+        assert jwt.decode(token, public, algorithms=["RS256"])["user_id"] == "123"
+
+        private_key, public_key = JWTAuthPlugin.generate_rsa_keys()
+        jwt_auth.keyset.reload(
+            [{"kid": "2025-01", "private_key": private_key, "public_key": public_key}],
+            active_kid="2025-01"
+        )
+        with pytest.raises(JWTError, match="Unknown key id"):
+            jwt_auth.verify_token(token)
+        new_token, _ = jwt_auth.generate_tokens({"user_id": "123"})
+        assert jwt_auth.verify_token(new_token)["user_id"] == "123"
+
+    def test_hmac_keys_not_exported(self):
+        jwt_auth = JWTAuthPlugin(TokenConfig(secret_key="test-secret-key", key_id="hs"))
+        assert jwt_auth.keyset.to_jwks() == {"keys": []}
+        token, _ = jwt_auth.generate_tokens({"user_id": "123"})
+        assert jwt_auth.verify_token(token)["user_id"] == "123"
+
+
+class TestAlgorithms:
+    @pytest.mark.parametrize("algorithm", ["ES256", "ES384", "EdDSA"])
+    def test_round_trip_with_generated_keys(self, algorithm):
+        jwt_auth = JWTAuthPlugin(TokenConfig(
+            secret_key="key-id", algorithm=algorithm, key_id="k1"))
+        access_token, refresh_token = jwt_auth.generate_tokens({"user_id": "123"})
+        assert jwt.get_unverified_header(access_token)["alg"] == algorithm
+        assert jwt_auth.verify_token(access_token)["user_id"] == "123"
+
+        new_access_token = jwt_auth.refresh_access_token(refresh_token)
+        assert jwt_auth.verify_token(new_access_token)["type"] == "access"
+
+        jwk = jwt_auth.keyset.to_jwks()["keys"][0]
+        assert jwk["kty"] == ("OKP" if algorithm == "EdDSA" else "EC")
+        assert jwt.decode(access_token, jwt.PyJWK(jwk).key,
+                          algorithms=[algorithm])["user_id"] == "123"
+
+    def test_explicit_keys(self):
+        private_key, public_key = generate_keys("EdDSA")
+        config = TokenConfig(
+            secret_key="key-id",
+            algorithm="EdDSA",
+            private_key=private_key,
+            public_key=public_key
+        )
+        token, _ = JWTAuthPlugin(config).generate_tokens({"user_id": "123"})
+        assert JWTAuthPlugin(config).verify_token(token)["user_id"] == "123"
+
+    def test_key_must_match_algorithm(self):
+        private_key, public_key = generate_keys("ES384")
+        with pytest.raises(JWTConfigurationError, match="P-256|secp256r1"):
+            JWTAuthPlugin(TokenConfig(
+                secret_key="key-id",
+                algorithm="ES256",
+                private_key=private_key,
+                public_key=public_key
+            ))
+
+        rsa_private, rsa_public = JWTAuthPlugin.generate_rsa_keys()
+        with pytest.raises(JWTConfigurationError, match="Ed25519"):
+            JWTAuthPlugin(TokenConfig(
+                secret_key="key-id",
+                algorithm="EdDSA",
+                private_key=rsa_private,
+                public_key=rsa_public
+            ))
+
+
+class TestTokenEncoder:
+    @pytest.fixture
+    def payload(self):
+        now = int(time.time())
+        return {"user_id": "123", "roles": ["admin"], "type": "access",
+                "exp": now + 300, "iat": now}
+
+    @pytest.mark.parametrize("algorithm,kid", [
+        ("HS256", None), ("HS512", "k1"), ("RS256", None), ("RS256", "2024-06"), ("EdDSA", "ed")
+    ])
+    def test_matches_pyjwt_byte_for_byte(self, algorithm, kid, payload):
+        keyset = KeySet(algorithm)
+        if algorithm.startswith("HS"):
+            keyset.add(kid, secret_key="test-secret-key-of-sixty-four-bytes-" + "x" * 28)
+        else:
+            private_key, public_key = generate_keys(algorithm)
+            keyset.add(kid, private_key=private_key, public_key=public_key)
+        entry = keyset.active()
+        headers = {"kid": kid} if kid is not None else None
+
+        encoder = TokenEncoder()
+        for _ in range(2):
+            assert encoder.encode(payload, entry) == jwt.encode(
+                payload, entry.signing_key, algorithm=algorithm, headers=headers)
+
+    def test_ecdsa_segments_match_pyjwt(self, payload):
+        private_key, public_key = generate_keys("ES256")
+        keyset = KeySet("ES256")
+        keyset.add("ec", private_key=private_key, public_key=public_key)
+        entry = keyset.active()
+
+        token = TokenEncoder().encode(payload, entry)
+        reference = jwt.encode(payload, entry.signing_key, algorithm="ES256",
+                               headers={"kid": "ec"})
+        # ECDSA signatures are randomized; everything before them must match
+        assert token.rsplit(".", 1)[0] == reference.rsplit(".", 1)[0]
+        assert jwt.decode(token, entry.verification_key, algorithms=["ES256"]) == payload
+
+    def test_datetime_claims_and_key_replacement(self, payload):
+        keyset = KeySet("HS256")
+        keyset.add(None, secret_key="first-secret-key-of-at-least-32-bytes")
+        encoder = TokenEncoder()
+        now = datetime.utcnow()
+        with_datetimes = {**payload, "iat": now, "exp": now + timedelta(seconds=60)}
+        assert encoder.encode(with_datetimes, keyset.active()) == jwt.encode(
+            with_datetimes, keyset.active().signing_key, algorithm="HS256")
+
+        keyset.add(None, secret_key="second-secret-key-of-at-least-32-bytes")
+        token = encoder.encode(payload, keyset.active())
+        assert jwt.decode(token, "second-secret-key-of-at-least-32-bytes",
+                          algorithms=["HS256"])["user_id"] == "123"
+
+    def test_pluggable_serializer(self, payload):
+        orjson = pytest.importorskip("orjson")
+        config = TokenConfig(secret_key="test-secret-key", json_serializer=orjson.dumps)
+        jwt_auth = JWTAuthPlugin(config)
+        access_token, _ = jwt_auth.generate_tokens({"user_id": "123"})
+        assert jwt_auth.verify_token(access_token)["user_id"] == "123"
+
+        # Compact orjson output matches PyJWT for ASCII payloads
+        entry = jwt_auth.keyset.active()
+        assert TokenEncoder(orjson.dumps).encode(payload, entry) == jwt.encode(
+            payload, entry.signing_key, algorithm="HS256")
+
+
+class TestMetrics:
+    @pytest.fixture
+    def config(self):
+        return TokenConfig(
+            secret_key="test-secret-key",
+            algorithm="HS256",
+            access_token_expiry=300,
+            refresh_token_expiry=3600,
+            cache_size=8
+        )
+
+    def test_typed_errors(self, config):
+        jwt_auth = JWTAuthPlugin(config)
+        now = int(time.time())
+        expired = jwt.encode({"type": "access", "exp": now - 10, "iat": now - 20},
+                             "test-secret-key", algorithm="HS256")
+        forged = jwt.encode({"type": "access", "exp": now + 60, "iat": now},
+                            "wrong-secret-key", algorithm="HS256")
+        access_token, refresh_token = jwt_auth.generate_tokens({"user_id": "123"})
+
+        with pytest.raises(JWTTokenExpiredError):
+            jwt_auth.verify_token(expired)
+        with pytest.raises(JWTSignatureError):
+            jwt_auth.verify_token(forged)
+        with pytest.raises(JWTInvalidTokenError):
+            jwt_auth.verify_token("invalid")
+        with pytest.raises(JWTInvalidTokenError, match="Invalid token type"):
+            jwt_auth.verify_token(refresh_token)
+        with pytest.raises(JWTError) as exc:
+            jwt_auth.refresh_access_token(expired)
+        assert exc.value.error_code == "TOKEN_EXPIRED"
+
+        jwt_auth.blacklist_token(access_token)
+        with pytest.raises(JWTBlacklistedError):
+            jwt_auth.verify_token(access_token)
+
+    def test_prometheus_metrics(self, config):
+        metrics = PrometheusMetrics()
+        jwt_auth = JWTAuthPlugin(config, metrics=metrics)
+        access_token, refresh_token = jwt_auth.generate_tokens({"user_id": "123"})
+        jwt_auth.verify_token(access_token)
+        jwt_auth.verify_token(access_token)
+        jwt_auth.refresh_access_token(refresh_token)
+        with pytest.raises(JWTError):
+            jwt_auth.verify_token("invalid")
+        jwt_auth.blacklist_token(access_token)
+        list(jwt_auth.generate_tokens_bulk([{"user_id": "1"}, {"user_id": "2"}]))
+
+        assert metrics.value("jwt_tokens_issued_total") == 7
+        # Two direct verifications plus the one inside refresh_access_token
+        assert metrics.value("jwt_tokens_verified_total") == 3
+        assert metrics.value("jwt_cache_hits_total", {"cache": "verified"}) == 1
+        assert metrics.value("jwt_tokens_blacklisted_total") == 1
+        assert metrics.value("jwt_failures_total", {
+            "operation": "verify_token", "error_code": "INVALID_TOKEN"}) == 1
+
+        text = metrics.render()
+        assert "# TYPE jwt_operation_duration_seconds histogram" in text
+        assert 'jwt_operation_duration_seconds_count{operation="verify_token"} 4' in text
+        assert 'jwt_operation_duration_seconds_bucket{operation="verify_token",le="+Inf"} 4' in text
+        assert 'jwt_failures_total{error_code="INVALID_TOKEN",operation="verify_token"} 1' in text
+
+    def test_async_verify_recorded(self, config):
+        metrics = PrometheusMetrics()
+        auth = AsyncJWTAuthPlugin(JWTAuthPlugin(config, metrics=metrics))
+
+        async def scenario():
+            access_token, _ = await auth.generate_tokens({"user_id": "123"})
+            await auth.verify_token(access_token)
+            with pytest.raises(JWTTokenExpiredError):
+                await auth.verify_token(jwt.encode(
+                    {"type": "access", "exp": 1, "iat": 0}, "test-secret-key", algorithm="HS256"))
+            await auth.close()
+
+        asyncio.run(scenario())
+        assert metrics.value("jwt_tokens_verified_total") == 1
+        assert metrics.value("jwt_failures_total", {
+            "operation": "verify_token", "error_code": "TOKEN_EXPIRED"}) == 1
+
+    def test_metrics_disabled_by_default(self, config):
+        jwt_auth = JWTAuthPlugin(config)
+        assert jwt_auth.metrics is None
+        access_token, _ = jwt_auth.generate_tokens({"user_id": "123"})
+        assert jwt_auth.verify_token(access_token)["user_id"] == "123"
+
+
+class TestImports:
+    def test_package_import_is_lazy(self):
+        probe = (
+            "import sys\n"
+            "import auth_plugin, auth_plugin.jwt\n"
+            "print(sorted(m for m in ('jwt', 'cryptography', 'sqlalchemy', 'asyncio') if m in sys.modules))\n"
+            "from auth_plugin import JWTAuthPlugin\n"
+            "print(sorted(m for m in ('jwt', 'sqlalchemy') if m in sys.modules))\n"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", probe], capture_output=True, text=True, check=True
+        ).stdout.split("\n")
+        assert output[0] == "[]"
+        assert output[1] == "['jwt']"
+
+    def test_lazy_attributes(self):
+        import auth_plugin.jwt as package
+
+        assert package.KeySet is KeySet
+        assert "SQLRevocationStore" in dir(package)
+        with pytest.raises(AttributeError):
+            package.DoesNotExist
@@ -0,0 +1,102 @@
+import time
+import pytest
+from sqlalchemy import create_engine
+from auth_plugin.jwt import (
+    JWTAuthPlugin,
+    TokenConfig,
+    JWTError,
+    MongoRevocationStore,
+    SQLRevocationStore
+)
+
+
+class TestRevocationStores:
+    @pytest.fixture
+    def config(self):
+        return TokenConfig(
+            secret_key="test-secret-key",
+            algorithm="HS256",
+            use_jti=True,
+            revocation_sync_interval=0
+        )
+
+    @pytest.fixture
+    def sql_store(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'revocations.db'}")
+        yield SQLRevocationStore(engine=engine)
+        engine.dispose()
+
+    @pytest.fixture
+    def mongo_store(self):
+        mongomock = pytest.importorskip("mongomock")
+        return MongoRevocationStore(collection=mongomock.MongoClient().db.revoked_tokens)
+
+    @pytest.fixture(params=["sql_store", "mongo_store"])
+    def store(self, request):
+        return request.getfixturevalue(request.param)
+
+    def test_revocation_propagates_between_replicas(self, config, store):
+        first = JWTAuthPlugin(config, revocation_store=store)
+        second = JWTAuthPlugin(config, revocation_store=store)
+        access_token, _ = first.generate_tokens({"user_id": "123"})
+        assert second.verify_token(access_token)["user_id"] == "123"
+
+        first.blacklist_token(access_token)
+        assert second.sync_revocations() == 1
+        with pytest.raises(JWTError, match="blacklisted"):
+            second.verify_token(access_token)
+
+        # Incremental syncs do not re-add entries already mirrored
+        assert second.sync_revocations() == 0
+
+        # New replicas load every unexpired revocation on start
+        third = JWTAuthPlugin(config, revocation_store=store)
+        with pytest.raises(JWTError, match="blacklisted"):
+            third.verify_token(access_token)
+
+    def test_full_token_keys_round_trip(self, store):
+        config = TokenConfig(secret_key="test-secret-key", revocation_sync_interval=0)
+        first = JWTAuthPlugin(config, revocation_store=store)
+        second = JWTAuthPlugin(config, revocation_store=store)
+        access_token, _ = first.generate_tokens({"user_id": "123"})
+
+        first.blacklist_token(access_token)
+        second.sync_revocations()
+        assert access_token in second._blacklisted_tokens
+
+    def test_purge_expired(self, store):
+        now = time.time()
+        store.add(b"0123456789abcdef", now - 10)
+        store.add("a.b.c", now + 3600)
+        # mongomock applies the TTL index itself, so the count may be 0
+        assert store.purge_expired(now) <= 1
+        entries, _ = store.changes_since(None)
+        assert entries == [("a.b.c", pytest.approx(now + 3600, abs=1e-3))]
+
+    def test_background_sync(self, sql_store):
+        config = TokenConfig(
+            secret_key="test-secret-key",
+            use_jti=True,
+            revocation_sync_interval=0.05
+        )
+        first = JWTAuthPlugin(config, revocation_store=sql_store)
+        second = JWTAuthPlugin(config, revocation_store=sql_store)
+        access_token, _ = first.generate_tokens({"user_id": "123"})
+        first.blacklist_token(access_token)
+
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            try:
+                second.verify_token(access_token)
+            except JWTError:
+                break
+            time.sleep(0.05)
+        else:
+            pytest.fail("revocation was not synced")
+
+        first.close()
+        second.close()
+
+    def test_sync_requires_store(self, config):
+        with pytest.raises(JWTError, match="No revocation store"):
+            JWTAuthPlugin(config).sync_revocations()
@@ -1,9 +1,71 @@
+import asyncio
+import json
+import threading
+import time
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import patch, MagicMock
 import requests
 import logging
 from auth_plugin.oauth2_auth import OAuth2Auth
 
+try:
+    from auth_plugin.async_oauth2_auth import AsyncOAuth2Auth
+except ImportError:  # httpx not installed
+    AsyncOAuth2Auth = None
+
+
+class StubTokenServer:
+    """Local token endpoint answering with queued (status, body, delay) responses"""
+
+    def __init__(self):
+        self.responses = []
+        self.requests = []
+        self.client_ports = set()
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length).decode() if length else ""
+                stub.requests.append((self.command, self.path, body))
+                stub.client_ports.add(self.client_address[1])
+                with stub._lock:
+                    stub.active += 1
+                    stub.max_active = max(stub.max_active, stub.active)
+                    status, payload, delay = (
+                        stub.responses.pop(0) if stub.responses else (200, {"access_token": "stub_token"}, 0))
+                time.sleep(delay)
+                with stub._lock:
+                    stub.active -= 1
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = _respond
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
 
 class TestOAuth2Auth(unittest.TestCase):
 
@@ -21,7 +83,7 @@ class TestOAuth2Auth(unittest.TestCase):
         auth_url = self.auth.get_authorization_url()
         self.assertEqual(auth_url, expected_url)
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_get_access_token_success(self, mock_post):
         mock_response = MagicMock()
         mock_response.raise_for_status = MagicMock()
@@ -39,9 +101,10 @@ class TestOAuth2Auth(unittest.TestCase):
                 "redirect_uri": "http://localhost/callback",
                 "grant_type": "authorization_code",
             },
+            timeout=(3.05, 10.0),
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     @patch("logging.error")
     def test_get_access_token_failure(self, mock_logging_error, mock_post):
         mock_post.side_effect = requests.exceptions.RequestException("Request failed")
@@ -53,7 +116,7 @@ class TestOAuth2Auth(unittest.TestCase):
             "Error getting access token: Request failed"
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     @patch("logging.error")
     def test_get_access_token_unexpected_error(self, mock_logging_error, mock_post):
         mock_response = MagicMock()
@@ -72,5 +135,391 @@ class TestOAuth2Auth(unittest.TestCase):
             self.auth.authenticate("test_token")
 
 
+class TestOAuth2Session(unittest.TestCase):
+
+    def setUp(self):
+        self.stub = StubTokenServer()
+        self.auth = OAuth2Auth(
+            client_id="test_client_id",
+            client_secret="test_client_secret",
+            redirect_uri="http://localhost/callback",
+            auth_url=f"{self.stub.url}/authorize",
+            token_url=f"{self.stub.url}/token",
+            read_timeout=0.2,
+            backoff_factor=0.01,
+        )
+
+    def tearDown(self):
+        self.auth.close()
+        self.stub.stop()
+
+    def test_connections_are_reused(self):
+        for _ in range(5):
+            self.assertEqual(self.auth.get_access_token("test_code"), "stub_token")
+        self.assertEqual(len(self.stub.requests), 5)
+        self.assertEqual(len(self.stub.client_ports), 1)
+        self.assertIn("grant_type=authorization_code", self.stub.requests[0][2])
+
+    def test_read_timeout(self):
+        self.stub.responses.append((200, {"access_token": "late"}, 0.5))
+        start = time.monotonic()
+        with self.assertRaises(RuntimeError):
+            self.auth.get_access_token("test_code")
+        self.assertLess(time.monotonic() - start, 0.45)
+        self.assertEqual(len(self.stub.requests), 1)
+
+    def test_code_exchange_is_not_retried(self):
+        self.stub.responses.append((503, {"error": "unavailable"}, 0))
+        with self.assertRaises(RuntimeError):
+            self.auth.get_access_token("test_code")
+        self.assertEqual(len(self.stub.requests), 1)
+
+    def test_idempotent_requests_are_retried(self):
+        self.stub.responses.extend([(503, {}, 0), (429, {}, 0)])
+        response = self.auth.session.get(f"{self.stub.url}/jwks", timeout=self.auth.timeout)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.stub.requests), 3)
+
+    def test_retries_exhausted(self):
+        self.stub.responses.extend([(503, {}, 0)] * 3)
+        response = self.auth.session.get(f"{self.stub.url}/jwks", timeout=self.auth.timeout)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(self.stub.requests), 3)
+
+    def test_external_session_is_not_closed(self):
+        session = MagicMock()
+        with OAuth2Auth("id", "secret", "http://localhost/callback", "http://auth", "http://token",
+                        session=session) as auth:
+            self.assertIs(auth.session, session)
+        session.close.assert_not_called()
+
+    def test_invalid_settings(self):
+        for kwargs in ({"pool_size": 0}, {"read_timeout": 0}, {"max_retries": -1}):
+            with self.assertRaises(ValueError):
+                OAuth2Auth("id", "secret", "http://localhost/callback", "http://auth", "http://token",
+                           **kwargs)
+
+
+class TestClientCredentialsCache(unittest.TestCase):
+
+    def setUp(self):
+        self.stub = StubTokenServer()
+        self.auth = OAuth2Auth(
+            client_id="test_client_id",
+            client_secret="test_client_secret",
+            redirect_uri="http://localhost/callback",
+            auth_url=f"{self.stub.url}/authorize",
+            token_url=f"{self.stub.url}/token",
+            backoff_factor=0.01,
+            expiry_leeway=0,
+        )
+
+    def tearDown(self):
+        self.auth.close()
+        self.stub.stop()
+
+    def grant_types(self):
+        return [body.split("grant_type=")[1].split("&")[0] for _, _, body in self.stub.requests]
+
+    def wait_for_requests(self, count):
+        deadline = time.monotonic() + 2
+        while len(self.stub.requests) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_tokens_are_cached_per_scope(self):
+        self.stub.responses.extend([
+            (200, {"access_token": "read_write", "expires_in": 3600}, 0),
+            (200, {"access_token": "admin", "expires_in": 3600}, 0),
+        ])
+        self.assertEqual(self.auth.get_client_credentials_token("write read"), "read_write")
+        self.assertEqual(self.auth.get_client_credentials_token(["read", "write"]), "read_write")
+        self.assertEqual(self.auth.get_client_credentials_token("admin"), "admin")
+        self.assertEqual(len(self.stub.requests), 2)
+        self.assertIn("scope=read+write", self.stub.requests[0][2])
+        self.assertEqual(self.grant_types(), ["client_credentials", "client_credentials"])
+
+    def test_concurrent_callers_share_one_request(self):
+        self.stub.responses.append((200, {"access_token": "shared", "expires_in": 3600}, 0.2))
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.auth.get_client_credentials_token()))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["shared"] * 8)
+        self.assertEqual(len(self.stub.requests), 1)
+
+    def test_proactive_refresh_uses_refresh_token(self):
+        self.auth.token_refresh_ratio = 0.1
+        self.stub.responses.extend([
+            (200, {"access_token": "first", "expires_in": 2, "refresh_token": "rt"}, 0),
+            (200, {"access_token": "second", "expires_in": 3600}, 0.1),
+        ])
+        self.assertEqual(self.auth.get_client_credentials_token(), "first")
+        time.sleep(0.25)
+        # Past the refresh point: the current token is served while a new one is fetched
+        self.assertEqual(self.auth.get_client_credentials_token(), "first")
+        self.wait_for_requests(2)
+        time.sleep(0.2)
+        self.assertEqual(self.auth.get_client_credentials_token(), "second")
+        self.assertEqual(self.grant_types(), ["client_credentials", "refresh_token"])
+        self.assertIn("refresh_token=rt", self.stub.requests[1][2])
+        self.assertEqual(self.auth._tokens[""].refresh_token, "rt")
+
+    def test_rejected_refresh_token_falls_back_to_client_credentials(self):
+        self.auth.token_refresh_ratio = 0.01
+        self.stub.responses.extend([
+            (200, {"access_token": "first", "expires_in": 0.05, "refresh_token": "rt"}, 0),
+            (400, {"error": "invalid_grant"}, 0),
+            (200, {"access_token": "second", "expires_in": 3600}, 0),
+        ])
+        self.assertEqual(self.auth.get_client_credentials_token(), "first")
+        time.sleep(0.1)
+        # Expired: the caller waits for the new token
+        self.assertEqual(self.auth.get_client_credentials_token(), "second")
+        self.assertEqual(self.grant_types(), ["client_credentials", "refresh_token", "client_credentials"])
+        self.assertIsNone(self.auth._tokens[""].refresh_token)
+
+    def test_failed_background_refresh_keeps_current_token(self):
+        self.auth.token_refresh_ratio = 0.01
+        self.stub.responses.extend([
+            (200, {"access_token": "first", "expires_in": 5}, 0),
+            (400, {"error": "invalid_client"}, 0),
+        ])
+        self.assertEqual(self.auth.get_client_credentials_token(), "first")
+        time.sleep(0.1)
+        with patch("logging.warning") as mock_warning:
+            self.assertEqual(self.auth.get_client_credentials_token(), "first")
+            self.wait_for_requests(2)
+            time.sleep(0.1)
+        mock_warning.assert_called_once()
+        # The next attempt waits for REFRESH_RETRY_INTERVAL
+        self.assertEqual(self.auth.get_client_credentials_token(), "first")
+        self.assertEqual(len(self.stub.requests), 2)
+
+    def test_fetch_failure_raises(self):
+        self.stub.responses.append((401, {"error": "invalid_client"}, 0))
+        with self.assertRaises(RuntimeError):
+            self.auth.get_client_credentials_token()
+
+    def test_invalidate_token(self):
+        self.stub.responses.extend([
+            (200, {"access_token": "first", "expires_in": 3600}, 0),
+            (200, {"access_token": "second", "expires_in": 3600}, 0),
+        ])
+        self.assertEqual(self.auth.get_client_credentials_token(), "first")
+        self.auth.invalidate_token()
+        self.assertEqual(self.auth.get_client_credentials_token(), "second")
+
+    def test_refresh_access_token_returns_full_response(self):
+        self.stub.responses.append(
+            (200, {"access_token": "new", "expires_in": 60, "refresh_token": "rt2"}, 0))
+        response = self.auth.refresh_access_token("rt", scope="read")
+        self.assertEqual(response["refresh_token"], "rt2")
+        self.assertIn("scope=read", self.stub.requests[0][2])
+
+
+class TestIntrospection(unittest.TestCase):
+
+    def setUp(self):
+        self.stub = StubTokenServer()
+        self.auth = OAuth2Auth(
+            client_id="test_client_id",
+            client_secret="test_client_secret",
+            redirect_uri="http://localhost/callback",
+            auth_url=f"{self.stub.url}/authorize",
+            token_url=f"{self.stub.url}/token",
+            introspection_url=f"{self.stub.url}/introspect",
+            introspection_cache_size=2,
+            introspection_negative_ttl=0.2,
+        )
+
+    def tearDown(self):
+        self.auth.close()
+        self.stub.stop()
+
+    def test_active_token_is_cached(self):
+        self.stub.responses.append((200, {"active": True, "sub": "user1", "exp": time.time() + 600}, 0))
+        for _ in range(3):
+            self.assertEqual(self.auth.authenticate("opaque")["sub"], "user1")
+        self.assertEqual(len(self.stub.requests), 1)
+        method, path, body = self.stub.requests[0]
+        self.assertEqual((method, path), ("POST", "/introspect"))
+        self.assertIn("token=opaque", body)
+        self.assertIn("token_type_hint=access_token", body)
+        self.assertEqual(self.auth.introspection_cache_info()["hits"], 2)
+
+    def test_callers_get_their_own_copy(self):
+        self.stub.responses.append((200, {"active": True, "sub": "user1"}, 0))
+        self.auth.authenticate("opaque")["sub"] = "admin"
+        self.assertEqual(self.auth.authenticate("opaque")["sub"], "user1")
+        self.assertEqual(len(self.stub.requests), 1)
+
+    def test_cached_result_never_outlives_exp(self):
+        self.stub.responses.extend([
+            (200, {"active": True, "sub": "user1", "exp": time.time() + 0.2}, 0),
+            (200, {"active": False}, 0),
+        ])
+        self.assertEqual(self.auth.authenticate("opaque")["sub"], "user1")
+        time.sleep(0.3)
+        self.assertIsNone(self.auth.authenticate("opaque"))
+        self.assertEqual(len(self.stub.requests), 2)
+
+    def test_expired_active_token_is_rejected(self):
+        self.stub.responses.append((200, {"active": True, "exp": time.time() - 1}, 0))
+        self.assertIsNone(self.auth.authenticate("opaque"))
+
+    def test_inactive_token_is_cached_briefly(self):
+        self.stub.responses.extend([
+            (200, {"active": False}, 0),
+            (200, {"active": True, "sub": "user1"}, 0),
+        ])
+        self.assertIsNone(self.auth.authenticate("opaque"))
+        self.assertIsNone(self.auth.authenticate("opaque"))
+        self.assertEqual(len(self.stub.requests), 1)
+        time.sleep(0.3)
+        self.assertEqual(self.auth.authenticate("opaque")["sub"], "user1")
+
+    def test_concurrent_lookups_share_one_request(self):
+        self.stub.responses.append((200, {"active": True, "sub": "user1"}, 0.2))
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.auth.authenticate("opaque")["sub"]))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["user1"] * 8)
+        self.assertEqual(len(self.stub.requests), 1)
+
+    def test_cache_is_bounded(self):
+        self.stub.responses.extend([(200, {"active": True, "sub": str(i)}, 0) for i in range(4)])
+        for token in ("t0", "t1", "t2", "t0"):
+            self.auth.authenticate(token)
+        self.assertEqual(len(self.stub.requests), 4)
+        self.assertEqual(self.auth.introspection_cache_info()["size"], 2)
+
+    def test_failures_are_not_cached(self):
+        self.stub.responses.extend([
+            (503, {}, 0),
+            (200, {"unexpected": True}, 0),
+            (200, {"active": True, "sub": "user1"}, 0),
+        ])
+        with patch("logging.error"):
+            for _ in range(2):
+                with self.assertRaises(RuntimeError):
+                    self.auth.authenticate("opaque")
+        self.assertEqual(self.auth.authenticate("opaque")["sub"], "user1")
+
+    def test_cache_disabled(self):
+        auth = OAuth2Auth("id", "secret", "http://localhost/callback", "http://auth", "http://token",
+                          introspection_url=f"{self.stub.url}/introspect", introspection_cache_size=0)
+        self.stub.responses.extend([(200, {"active": True}, 0)] * 2)
+        auth.authenticate("opaque")
+        auth.authenticate("opaque")
+        self.assertEqual(len(self.stub.requests), 2)
+        self.assertIsNone(auth.introspection_cache_info())
+        auth.close()
+
+
+@unittest.skipIf(AsyncOAuth2Auth is None, "httpx is not installed")
+class TestAsyncOAuth2Auth(unittest.TestCase):
+
+    def setUp(self):
+        self.stub = StubTokenServer()
+
+    def tearDown(self):
+        self.stub.stop()
+
+    def make_auth(self, **kwargs):
+        return AsyncOAuth2Auth(
+            client_id="test_client_id",
+            client_secret="test_client_secret",
+            redirect_uri="http://localhost/callback",
+            auth_url=f"{self.stub.url}/authorize",
+            token_url=f"{self.stub.url}/token",
+            **kwargs,
+        )
+
+    def test_get_authorization_url(self):
+        auth = self.make_auth()
+        self.assertEqual(
+            auth.get_authorization_url(),
+            f"{self.stub.url}/authorize?client_id=test_client_id"
+            "&redirect_uri=http://localhost/callback&response_type=code")
+
+    def test_identical_requests_are_coalesced(self):
+        self.stub.responses.append((200, {"access_token": "shared"}, 0.1))
+
+        async def scenario():
+            async with self.make_auth() as auth:
+                return await asyncio.gather(*(auth.get_access_token("same_code") for _ in range(10)))
+
+        self.assertEqual(asyncio.run(scenario()), ["shared"] * 10)
+        self.assertEqual(len(self.stub.requests), 1)
+        self.assertIn("code=same_code", self.stub.requests[0][2])
+
+    def test_concurrency_cap(self):
+        self.stub.responses.extend([(200, {"access_token": f"token{i}"}, 0.05) for i in range(8)])
+
+        async def scenario():
+            async with self.make_auth(max_concurrency=2) as auth:
+                return await asyncio.gather(*(auth.get_access_token(f"code{i}") for i in range(8)))
+
+        self.assertEqual(sorted(asyncio.run(scenario())), sorted(f"token{i}" for i in range(8)))
+        self.assertEqual(len(self.stub.requests), 8)
+        self.assertLessEqual(self.stub.max_active, 2)
+
+    def test_refresh_and_connection_reuse(self):
+        self.stub.responses.extend([
+            (200, {"access_token": "a1", "refresh_token": "rt1", "expires_in": 60}, 0),
+            (200, {"access_token": "a2", "refresh_token": "rt2", "expires_in": 60}, 0),
+        ])
+
+        async def scenario():
+            async with self.make_auth() as auth:
+                first = await auth.refresh_access_token("rt0", scope="write read")
+                second = await auth.refresh_access_token(first["refresh_token"])
+                return first, second
+
+        first, second = asyncio.run(scenario())
+        self.assertEqual((first["access_token"], second["access_token"]), ("a1", "a2"))
+        self.assertIn("scope=read+write", self.stub.requests[0][2])
+        self.assertIn("grant_type=refresh_token", self.stub.requests[1][2])
+        self.assertEqual(len(self.stub.client_ports), 1)
+
+    def test_errors_raise_runtime_error(self):
+        self.stub.responses.extend([(400, {"error": "invalid_grant"}, 0), (200, ["not", "a", "dict"], 0)])
+
+        async def scenario():
+            async with self.make_auth() as auth:
+                for _ in range(2):
+                    with self.assertRaises(RuntimeError):
+                        await auth.get_access_token("bad_code")
+                # Failed requests are not cached
+                return await auth.get_access_token("bad_code")
+
+        with patch("logging.error"):
+            self.assertEqual(asyncio.run(scenario()), "stub_token")
+
+    def test_cancelled_caller_does_not_cancel_others(self):
+        self.stub.responses.append((200, {"access_token": "shared"}, 0.1))
+
+        async def scenario():
+            async with self.make_auth() as auth:
+                first = asyncio.ensure_future(auth.get_access_token("code"))
+                second = asyncio.ensure_future(auth.get_access_token("code"))
+                await asyncio.sleep(0.02)
+                first.cancel()
+                return await second
+
+        self.assertEqual(asyncio.run(scenario()), "shared")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,5 +1,5 @@
 import unittest
-from auth_plugin.utils import extract_token_from_header
+from auth_plugin.utils import extract_token_from_header, parse_bearer_token
 
 
 class TestUtils(unittest.TestCase):
@@ -14,6 +14,22 @@ class TestUtils(unittest.TestCase):
         token = extract_token_from_header(auth_header)
         self.assertIsNone(token)
 
+    def test_extract_token_scheme_is_case_insensitive(self):
+        self.assertEqual(extract_token_from_header("bearer sometokenvalue"), "sometokenvalue")
+        self.assertEqual(extract_token_from_header("BEARER sometokenvalue"), "sometokenvalue")
+
+    def test_extract_token_ignores_extra_spaces(self):
+        self.assertEqual(extract_token_from_header("  Bearer   sometokenvalue  "), "sometokenvalue")
+        self.assertEqual(extract_token_from_header("Bearer\tsometokenvalue"), "sometokenvalue")
+
+    def test_extract_token_rejects_malformed_headers(self):
+        for auth_header in (None, "", "Bearer", "Bearer ", "Bearersometokenvalue", "Bearer a b"):
+            self.assertIsNone(extract_token_from_header(auth_header))
+
+    def test_parse_bearer_token_from_bytes(self):
+        self.assertEqual(parse_bearer_token(b"Bearer sometokenvalue"), "sometokenvalue")
+        self.assertIsNone(parse_bearer_token(b"Basic dXNlcjpwYXNz"))
+
 
 if __name__ == "__main__":
     unittest.main()